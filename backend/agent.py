@@ -2,36 +2,62 @@ import os
 import asyncio
 import random
 import json
-from playwright.async_api import async_playwright
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.utilities import GoogleSearchAPIWrapper
+from backend.shared_resources import browser_pool
+from backend.search import get_search
+from backend.llm import gemini
+from backend.content_cache import get_content_cache
+from backend.fetcher import get_fetcher
+from backend.metrics import span
+from backend.settle import Settler
+from backend.blocking import RequestBlocker
+from backend.storage_state import load_state, refresh_state
 from langchain_core.prompts import PromptTemplate
 
 async def browse_url_content(url: str) -> str:
+    content_cache = get_content_cache()
+    if content_cache:
+        cached = await content_cache.get(url)
+        if cached:
+            return cached
+    
+    # Fast path: plain HTTP for server-rendered pages, Playwright only when needed
+    fetcher = get_fetcher()
+    if fetcher:
+        fetched = await fetcher.fetch(url)
+        if fetched:
+            text = fetched.text[:5000]
+            if content_cache:
+                await content_cache.put(url, text, fetched.headers)
+            return text
+    
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            )
-            page = await context.new_page()
+        # Consent cookies saved by a field agent on this domain keep the banner away here too
+        storage_state = await load_state(url)
+        async with browser_pool.context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            storage_state=storage_state,
+        ) as context:
+            page = await RequestBlocker(context).new_page()
+            settler = Settler(page)
             
-            try:
-                await page.goto(url, timeout=30000, wait_until="domcontentloaded")
-                # Wait a bit for dynamic content
-                await page.wait_for_timeout(3000)
-                
-                # Extract text from body
-                text = await page.evaluate("document.body.innerText")
-                
-                # Simple cleaning
-                lines = (line.strip() for line in text.splitlines())
-                chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-                text = ' '.join(chunk for chunk in chunks if chunk)
-                
-                return text[:5000]  # Increased limit for browser content
-            finally:
-                await browser.close()
+            with span("navigation", "goto"):
+                response = await page.goto(url, timeout=30000, wait_until="domcontentloaded")
+            # Wait for dynamic content
+            await settler.settle("browse_url_content", max_wait=8, baseline=3)
+            
+            # Extract text from body
+            text = await page.evaluate("document.body.innerText")
+            
+            # Simple cleaning
+            lines = (line.strip() for line in text.splitlines())
+            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+            text = ' '.join(chunk for chunk in chunks if chunk)[:5000]  # Increased limit for browser content
+            
+            if content_cache:
+                await content_cache.put(url, text, response.headers if response else None)
+            if storage_state:
+                await refresh_state(context, url, page.url)
+            return text
     except Exception as e:
         print(f"Error browsing {url}: {e}")
         return ""
@@ -45,48 +71,49 @@ async def crawl_site_map(url: str):
     found_urls = set()
     
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            )
-            page = await context.new_page()
+        storage_state = await load_state(url)
+        async with browser_pool.context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
+            storage_state=storage_state,
+        ) as context:
+            page = await RequestBlocker(context).new_page()
+            settler = Settler(page)
             
-            try:
-                yield json.dumps({"type": "log", "message": f"🕷️ Crawling homepage: {url}..."}) + "\n"
+            yield json.dumps({"type": "log", "message": f"🕷️ Crawling homepage: {url}..."}) + "\n"
+            with span("navigation", "goto"):
                 await page.goto(url, timeout=30000, wait_until="domcontentloaded")
-                await page.wait_for_timeout(2000)
-                
-                # Extract all links
-                links = await page.evaluate("""
-                    () => {
-                        return Array.from(document.querySelectorAll('a')).map(a => ({
-                            href: a.href,
-                            text: a.innerText.toLowerCase()
-                        }));
-                    }
-                """)
-                
-                yield json.dumps({"type": "log", "message": f"🕸️ Found {len(links)} links on homepage."}) + "\n"
+            await settler.settle("crawl_site_map", max_wait=6, baseline=2)
+            
+            # Extract all links
+            links = await page.evaluate("""
+                () => {
+                    return Array.from(document.querySelectorAll('a')).map(a => ({
+                        href: a.href,
+                        text: a.innerText.toLowerCase()
+                    }));
+                }
+            """)
+            
+            yield json.dumps({"type": "log", "message": f"🕸️ Found {len(links)} links on homepage."}) + "\n"
+            
+            for link in links:
+                href = link['href']
+                text = link['text']
                 
-                for link in links:
-                    href = link['href']
-                    text = link['text']
+                # Basic validation
+                if not href or href.startswith("javascript") or href.startswith("mailto"):
+                    continue
                     
-                    # Basic validation
-                    if not href or href.startswith("javascript") or href.startswith("mailto"):
-                        continue
-                        
-                    # Check if it matches keywords (in URL or text)
-                    if any(kw in href.lower() or kw in text for kw in high_value_keywords):
-                        # Ensure it's the same domain (or subdomain)
-                        if url in href or href.startswith("/"):
-                            if href not in found_urls:
-                                found_urls.add(href)
-                                yield json.dumps({"type": "log", "message": f"✨ Discovered high-value link: {text} -> {href}"}) + "\n"
-                            
-            finally:
-                await browser.close()
+                # Check if it matches keywords (in URL or text)
+                if any(kw in href.lower() or kw in text for kw in high_value_keywords):
+                    # Ensure it's the same domain (or subdomain)
+                    if url in href or href.startswith("/"):
+                        if href not in found_urls:
+                            found_urls.add(href)
+                            yield json.dumps({"type": "log", "message": f"✨ Discovered high-value link: {text} -> {href}"}) + "\n"
+            
+            if storage_state:
+                await refresh_state(context, url, page.url)
                 
     except Exception as e:
         yield json.dumps({"type": "log", "message": f"⚠️ Error crawling site map: {e}"}) + "\n"
@@ -103,8 +130,9 @@ class RiskAssessmentAgent:
         if not api_key or not cse_id:
             print("Warning: GOOGLE_API_KEY or GOOGLE_CSE_ID not found.")
         
-        self.llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=api_key, temperature=0.2)
-        self.search = GoogleSearchAPIWrapper(google_api_key=api_key, google_cse_id=cse_id)
+        # Same rate-limited, traced clients as the graph (llm_limiter / search_limiter)
+        self.llm = gemini(temperature=0.2)
+        self.async_search = get_search()
 
 
 
@@ -116,18 +144,17 @@ class RiskAssessmentAgent:
             f"{company_name} homepage"
         ]
         
-        for query in queries:
-            try:
-                results = self.search.results(query, 3)
-                for r in results:
-                    link = r.get("link", "")
-                    # Basic filter to avoid social media/news aggregators if possible
-                    # This is a heuristic; can be improved
-                    if "linkedin.com" in link or "facebook.com" in link or "bloomberg.com" in link:
-                        continue
-                    return link
-            except Exception:
+        # Fire all queries at once, then take the first hit in priority order
+        for results in await self.async_search.results_many(queries, 3):
+            if isinstance(results, Exception):
                 continue
+            for r in results:
+                link = r.get("link", "")
+                # Basic filter to avoid social media/news aggregators if possible
+                # This is a heuristic; can be improved
+                if "linkedin.com" in link or "facebook.com" in link or "bloomberg.com" in link:
+                    continue
+                return link
         return None
 
     async def run_assessment(self, company_name: str, address: str, state: str, company_type: str):
@@ -182,11 +209,15 @@ class RiskAssessmentAgent:
                 f"site:{domain} legal terms privacy",
             ])
         
-        search_results = []
         for query in search_queries:
+            yield json.dumps({"type": "log", "message": f"🔎 Searching: {query}..."}) + "\n"
+        all_results = await self.async_search.results_many(search_queries, 10)
+        
+        search_results = []
+        for query, results in zip(search_queries, all_results):
             try:
-                yield json.dumps({"type": "log", "message": f"🔎 Searching: {query}..."}) + "\n"
-                results = self.search.results(query, 10)
+                if isinstance(results, Exception):
+                    raise results
                 
                 # Add snippets from all results
                 search_results.extend([f"Snippet: {r.get('snippet', '')}" for r in results])
@@ -0,0 +1,255 @@
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from backend.cache import CACHE_DIR
+from backend.shared_resources import EventChannel, open_channel, release_channel
+
+# Assessment records/event logs and LangGraph checkpoints live next to the caches
+ASSESSMENT_DB = os.getenv("ASSESSMENT_DB", os.path.join(CACHE_DIR, "assessments.sqlite3"))
+CHECKPOINT_DB = os.getenv("CHECKPOINT_DB", os.path.join(CACHE_DIR, "checkpoints.sqlite3"))
+ASSESSMENT_RETENTION_DAYS = float(os.getenv("ASSESSMENT_RETENTION_DAYS", "7"))
+# Most events the pump records in one SQLite transaction
+EVENT_BATCH_SIZE = int(os.getenv("EVENT_BATCH_SIZE", "100"))
+
+
+class AssessmentStore:
+    """
+    Durable record of every assessment: its request, status and numbered event log.
+
+    Every event sent to the client (except preview frames, which are only useful live)
+    is appended with a per-assessment sequence number. The number doubles as the SSE
+    event ID, so a reconnecting client can replay exactly what it missed.
+    The a* variants run the same queries in a worker thread, for use on the event loop.
+    """
+
+    def __init__(self, path: str = None, retention_days: float = None):
+        path = path or ASSESSMENT_DB
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS assessments ("
+            "id TEXT PRIMARY KEY, request TEXT NOT NULL, status TEXT NOT NULL, "
+            "created REAL NOT NULL, updated REAL NOT NULL)"
+        )
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS events ("
+            "assessment_id TEXT NOT NULL, seq INTEGER NOT NULL, event TEXT NOT NULL, "
+            "PRIMARY KEY (assessment_id, seq))"
+        )
+        self._prune(retention_days if retention_days is not None else ASSESSMENT_RETENTION_DAYS)
+
+    def _prune(self, retention_days: float):
+        if retention_days <= 0:
+            return
+        cutoff = time.time() - retention_days * 24 * 3600
+        with self._lock:
+            self._db.execute("DELETE FROM events WHERE assessment_id IN (SELECT id FROM assessments WHERE updated < ?)", (cutoff,))
+            self._db.execute("DELETE FROM assessments WHERE updated < ?", (cutoff,))
+
+    def create(self, assessment_id: str, request: dict):
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO assessments (id, request, status, created, updated) VALUES (?, ?, 'running', ?, ?)",
+                (assessment_id, json.dumps(request), now, now)
+            )
+
+    def get(self, assessment_id: str) -> dict | None:
+        with self._lock:
+            row = self._db.execute(
+                "SELECT request, status, created, updated FROM assessments WHERE id = ?", (assessment_id,)
+            ).fetchone()
+            last_seq = self._last_seq(assessment_id)
+        if row is None:
+            return None
+        request, status, created, updated = row
+        return {"id": assessment_id, "request": json.loads(request), "status": status,
+                "created": created, "updated": updated, "last_event_id": last_seq}
+
+    def set_status(self, assessment_id: str, status: str):
+        with self._lock:
+            self._db.execute("UPDATE assessments SET status = ?, updated = ? WHERE id = ?", (status, time.time(), assessment_id))
+
+    def mark_interrupted(self) -> list:
+        """Flags runs left 'running' by a previous process; returns their IDs."""
+        with self._lock:
+            ids = [row[0] for row in self._db.execute("SELECT id FROM assessments WHERE status = 'running'")]
+            self._db.execute("UPDATE assessments SET status = 'interrupted' WHERE status = 'running'")
+        return ids
+
+    def _last_seq(self, assessment_id: str) -> int:
+        return self._db.execute(
+            "SELECT COALESCE(MAX(seq), 0) FROM events WHERE assessment_id = ?", (assessment_id,)
+        ).fetchone()[0]
+
+    def last_seq(self, assessment_id: str) -> int:
+        with self._lock:
+            return self._last_seq(assessment_id)
+
+    def append(self, assessment_id: str, events: list):
+        """Records (seq, event) pairs in one transaction; `updated` moves with the status, not per event."""
+        with self._lock:
+            with self._db:
+                self._db.execute("BEGIN")
+                self._db.executemany(
+                    "INSERT INTO events (assessment_id, seq, event) VALUES (?, ?, ?)",
+                    [(assessment_id, seq, event) for seq, event in events]
+                )
+
+    def events_after(self, assessment_id: str, seq: int, limit: int = 500) -> list:
+        with self._lock:
+            return self._db.execute(
+                "SELECT seq, event FROM events WHERE assessment_id = ? AND seq > ? ORDER BY seq LIMIT ?",
+                (assessment_id, seq, limit)
+            ).fetchall()
+
+    async def aappend(self, assessment_id: str, events: list):
+        await asyncio.to_thread(self.append, assessment_id, events)
+
+    async def aevents_after(self, assessment_id: str, seq: int, limit: int = 500) -> list:
+        return await asyncio.to_thread(self.events_after, assessment_id, seq, limit)
+
+    async def aset_status(self, assessment_id: str, status: str):
+        await asyncio.to_thread(self.set_status, assessment_id, status)
+
+
+class AssessmentRun:
+    """
+    An assessment executing in this process.
+
+    The run owns the assessment's EventChannel and pumps it into the store, so the
+    graph keeps going (and its events keep being recorded) whether or not a client
+    is connected. Any number of SSE subscribers can follow it from any event ID.
+    """
+
+    def __init__(self, store: AssessmentStore, channel: EventChannel):
+        self.id = channel.id
+        self.store = store
+        self.channel = channel
+        self.task = None
+        self.done = False
+        self.last_seq = store.last_seq(self.id)
+        self.previews = {}     # agent_id -> (version, newest preview frame)
+        self.version = 0       # Bumped on every event; subscribers wait for it to change
+        self._cond = asyncio.Condition()
+
+    async def _pump(self):
+        # Whatever queued up while the previous batch was being written goes in one transaction
+        while True:
+            events = await self.channel.get_many(EVENT_BATCH_SIZE)
+            if not events:
+                break
+            rows, previews = [], []
+            for event in events:
+                try:
+                    parsed = json.loads(event)
+                except ValueError:
+                    parsed = None
+                if isinstance(parsed, dict) and parsed.get("type") == "preview":
+                    previews.append((parsed.get("agent_id"), event))
+                else:
+                    rows.append((self.last_seq + len(rows) + 1, event))
+            if rows:
+                await self.store.aappend(self.id, rows)
+            async with self._cond:
+                self.version += 1
+                for agent_id, event in previews:
+                    self.previews[agent_id] = (self.version, event)
+                if rows:
+                    self.last_seq = rows[-1][0]
+                self._cond.notify_all()
+        async with self._cond:
+            self.done = True
+            self.version += 1
+            self._cond.notify_all()
+
+    def start(self, work):
+        """Runs `work(channel)` in the background; the channel is closed when it finishes."""
+        async def run():
+            pump = asyncio.create_task(self._pump())
+            try:
+                status = await work(self.channel)
+                await self.store.aset_status(self.id, status)
+            except asyncio.CancelledError:
+                self.store.set_status(self.id, "interrupted")  # Shutting down: record it before the loop goes
+                raise
+            except Exception as e:
+                await self.channel.put(json.dumps({"type": "error", "message": str(e)}), critical=True)
+                await self.store.aset_status(self.id, "error")
+            finally:
+                await self.channel.close()
+                await pump
+                release_channel(self.id)
+                _runs.pop(self.id, None)
+
+        self.task = asyncio.create_task(run())
+        return self
+
+    async def subscribe(self, after: int = 0):
+        """Yields (seq, event) from event `after` onwards, following the run live; previews have seq None."""
+        sent_previews = {}
+        while True:
+            version = self.version
+            for seq, event in await self.store.aevents_after(self.id, after):
+                after = seq
+                yield seq, event
+            for agent_id, (preview_version, event) in list(self.previews.items()):
+                if sent_previews.get(agent_id) != preview_version:
+                    sent_previews[agent_id] = preview_version
+                    yield None, event
+
+            if after < self.last_seq:
+                continue  # More recorded events than one page
+            if self.done:
+                return
+            async with self._cond:
+                await self._cond.wait_for(lambda: self.version != version)
+
+
+# Runs executing in this process, keyed by assessment ID
+_runs: dict[str, AssessmentRun] = {}
+_store = None
+
+
+def get_store() -> AssessmentStore:
+    global _store
+    if _store is None:
+        _store = AssessmentStore()
+    return _store
+
+
+def get_run(assessment_id: str) -> AssessmentRun | None:
+    return _runs.get(assessment_id)
+
+
+def start_run(work, assessment_id: str = None, request: dict = None) -> AssessmentRun:
+    """
+    Starts (or, for an existing ID, resumes) an assessment in the background.
+    `work(channel)` does the actual run and returns the final status ("done"/"error").
+    """
+    store = get_store()
+    channel = open_channel(assessment_id)
+    if request is not None:
+        store.create(channel.id, request)
+    else:
+        store.set_status(channel.id, "running")
+    run = AssessmentRun(store, channel)
+    _runs[run.id] = run
+    return run.start(work)
+
+
+async def replay(assessment_id: str, after: int = 0):
+    """Yields (seq, event) of a run that isn't executing in this process."""
+    store = get_store()
+    while True:
+        rows = await store.aevents_after(assessment_id, after)
+        if not rows:
+            return
+        for seq, event in rows:
+            after = seq
+            yield seq, event
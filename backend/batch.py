@@ -0,0 +1,133 @@
+import csv
+import io
+import json
+import asyncio
+from backend.scheduler import batch_slots
+from backend.assessments import get_store, start_run
+from backend.shared_resources import open_channel, release_channel
+
+# CSV headers accepted for each AssessmentRequest field (besides the field name itself)
+CSV_ALIASES = {
+    "companyName": ("company", "company_name", "name"),
+    "companyAddress": ("address", "company_address"),
+    "state": ("location",),
+    "companyType": ("type", "company_type"),
+}
+
+
+def parse_csv(text: str) -> list[dict]:
+    """Rows of a CSV upload as AssessmentRequest-shaped dicts (unknown columns are ignored)."""
+    rows = []
+    for row in csv.DictReader(io.StringIO(text.lstrip("\ufeff"))):
+        row = {(k or "").strip(): (v or "").strip() for k, v in row.items()}
+        item = {}
+        for field, aliases in CSV_ALIASES.items():
+            for column in (field, *aliases):
+                if row.get(column):
+                    item[field] = row[column]
+                    break
+        if item:
+            rows.append(item)
+    return rows
+
+
+class BatchRun:
+    """
+    Many assessments screened together under the process-wide scheduler budgets.
+
+    Every company becomes a regular (durable, resumable) assessment; at most
+    BATCH_MAX_CONCURRENT of them execute at once and the rest wait their turn.
+    The batch has its own channel carrying per-company progress and an aggregate
+    feed (counts after every completion, then a final `batch_done`).
+    """
+
+    def __init__(self, requests: list[dict]):
+        self.channel = open_channel()
+        self.id = self.channel.id
+        self.items = [
+            {"index": i, "company": r["companyName"], "assessment_id": None, "status": "queued"}
+            for i, r in enumerate(requests)
+        ]
+        self.requests = requests
+        self.task = None
+
+    async def _publish(self, event: dict, critical: bool = False):
+        await self.channel.put(json.dumps(event), critical=critical)
+
+    def aggregate(self) -> dict:
+        counts = {}
+        for item in self.items:
+            counts[item["status"]] = counts.get(item["status"], 0) + 1
+        finished = sum(1 for item in self.items if item["status"] not in ("queued", "running"))
+        return {"type": "aggregate", "batch_id": self.id, "total": len(self.items), "finished": finished, "counts": counts}
+
+    def start(self, execute, build_inputs):
+        """Starts every company; `execute(channel, inputs)` runs one assessment and returns its status."""
+        async def run():
+            await self._publish({"type": "batch", "id": self.id, "items": self.items}, critical=True)
+            try:
+                await asyncio.gather(*(
+                    self._run_item(item, request, execute, build_inputs)
+                    for item, request in zip(self.items, self.requests)
+                ))
+                await self._publish({**self.aggregate(), "type": "batch_done"}, critical=True)
+            finally:
+                await self.channel.close()
+                _batches.pop(self.id, None)
+
+        self.task = asyncio.create_task(run())
+        return self
+
+    async def _run_item(self, item: dict, request: dict, execute, build_inputs):
+        async def work(channel):
+            await channel.put(json.dumps({"type": "assessment", "id": channel.id}), critical=True)
+            async with batch_slots:
+                item["status"] = "running"
+                await self._publish({"type": "company_started", **item})
+                return await execute(channel, build_inputs(request))
+
+        run = start_run(work, request=request)
+        item["assessment_id"] = run.id
+
+        # Relay the company's own stream as progress (previews stay on the company's stream)
+        result = None
+        async for seq, event in run.subscribe():
+            if seq is None:
+                continue
+            msg = json.loads(event)
+            if msg.get("type") in ("log", "error"):
+                await self._publish({"type": "progress", "index": item["index"], "company": item["company"],
+                                     "assessment_id": run.id, "message": msg.get("message")})
+            elif msg.get("type") == "result":
+                result = msg.get("data")
+
+        item["status"] = (get_store().get(run.id) or {}).get("status", "error")
+        await self._publish({"type": "company_done", **item, "data": result}, critical=True)
+        await self._publish(self.aggregate(), critical=True)
+
+    async def events(self):
+        """The batch feed. Only one consumer; leaving it early does not stop the batch."""
+        try:
+            while True:
+                event = await self.channel.get()
+                if event is None:
+                    break
+                yield event
+        finally:
+            # Nobody is listening any more: drop further feed events instead of buffering them
+            await self.channel.close()
+            release_channel(self.id)
+
+
+# Batches executing in this process, keyed by batch ID
+_batches: dict[str, BatchRun] = {}
+
+
+def start_batch(requests: list[dict], execute, build_inputs) -> BatchRun:
+    batch = BatchRun(requests)
+    _batches[batch.id] = batch
+    return batch.start(execute, build_inputs)
+
+
+def get_batch(batch_id: str) -> BatchRun | None:
+    return _batches.get(batch_id)
@@ -0,0 +1,8 @@
+"""
+Offline end-to-end benchmark: runs the LangGraph pipeline and RiskAssessmentAgent against a
+fake search engine, a deterministic fake chat model and a local corpus of web sites.
+
+    python -m backend.bench --companies 4 --runs 8 --concurrency 2 --out bench.json
+
+See `backend/bench/__main__.py` for options.
+"""
@@ -0,0 +1,288 @@
+import os
+import sys
+import json
+import time
+import uuid
+import math
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import subprocess
+
+# Settings that shape a run and are worth recording next to its numbers
+RECORDED_ENV = (
+    "PIPELINE_MODE", "FILTER_GRADING_MODE", "SYNTHESIS_MODE", "FETCH_HTTP_FIRST", "FIELD_AGENT_MODE",
+    "BROWSER_POOL_SIZE", "BROWSER_POOL_MAX_CONTEXTS", "GEMINI_RPS", "GEMINI_MAX_CONCURRENCY",
+    "CSE_QPS", "SEARCH_MAX_CONCURRENCY",
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(prog="python -m backend.bench", description="Offline end-to-end benchmark")
+    parser.add_argument("--target", choices=["graph", "agent", "all"], default="all", help="create_graph() pipeline, RiskAssessmentAgent.run_assessment, or both")
+    parser.add_argument("--companies", type=int, default=4, help="companies in the corpus")
+    parser.add_argument("--runs", type=int, default=8, help="measured assessments per target")
+    parser.add_argument("--concurrency", type=int, default=2, help="assessments in flight at once")
+    parser.add_argument("--warmup", type=int, default=1, help="unmeasured assessments per target")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="seconds per fake LLM call")
+    parser.add_argument("--seconds-per-token", type=float, default=0.002, help="extra fake LLM latency per output token")
+    parser.add_argument("--report-tokens", type=int, default=600, help="size of the fake report's markdown")
+    parser.add_argument("--search-latency", type=float, default=0.2, help="seconds per fake search query")
+    parser.add_argument("--slow-delay", type=float, default=1.5, help="delay of the corpus' slow pages")
+    parser.add_argument("--read-delay-scale", type=float, default=0.0, help="scales RiskAssessmentAgent's simulated 3-6s reading pauses")
+    parser.add_argument("--port", type=int, default=8765, help="corpus server port")
+    parser.add_argument("--out", help="write the JSON report here instead of stdout")
+    return parser.parse_args()
+
+
+def configure_env():
+    # Must run before any backend import: no caches (every run pays full cost), no API rate
+    # limits (the fakes are free), headless field agents, and dummy credentials.
+    for key, value in {
+        "SEARCH_CACHE_TTL": "0",
+        "CONTENT_CACHE_TTL": "0",
+        "GRADE_CACHE_TTL": "0",
+        "POPUP_CACHE_TTL": "0",
+        "STORAGE_STATE_TTL": "0",
+        "GEMINI_RPS": "0",
+        "CSE_QPS": "0",
+        "FIELD_AGENT_HEADLESS": "1",
+        "GOOGLE_API_KEY": "bench",
+        "GOOGLE_CSE_ID": "bench",
+    }.items():
+        os.environ.setdefault(key, value)
+
+
+def percentile(values: list, q: float) -> float | None:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return round(ordered[rank - 1], 3)
+
+
+def peak_self_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class RssSampler:
+    """Samples the RSS of this process plus its children (Chromium) when psutil is available."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak = 0
+        self._task = None
+        try:
+            import psutil
+            self._process = psutil.Process()
+        except ImportError:
+            self._process = None
+
+    async def _sample(self):
+        while True:
+            try:
+                total = self._process.memory_info().rss
+                for child in self._process.children(recursive=True):
+                    try:
+                        total += child.memory_info().rss
+                    except Exception:
+                        pass  # Child exited between listing and sampling
+                self.peak = max(self.peak, total)
+            except Exception:
+                pass
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        if self._process is not None:
+            self._task = asyncio.create_task(self._sample())
+
+    async def stop(self) -> float | None:
+        if self._task is None:
+            return None
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return round(self.peak / (1024 * 1024), 1)
+
+
+class ScaledRandom:
+    """Replaces `random` in backend.agent so its simulated reading pauses can be shortened."""
+
+    def __init__(self, scale: float):
+        self.scale = scale
+
+    def uniform(self, a: float, b: float) -> float:
+        return random.uniform(a, b) * self.scale
+
+    def __getattr__(self, name):
+        return getattr(random, name)
+
+
+async def run_target(name: str, assess, companies: list, args) -> dict:
+    """Runs `args.runs` assessments (after warm-up) with `args.concurrency` in flight."""
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def job(i: int):
+        async with semaphore:
+            return await assess(companies[i % len(companies)])
+
+    for i in range(args.warmup):
+        await job(i)
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(job(i) for i in range(args.runs)))
+    wall = time.perf_counter() - started
+
+    latencies = [r["seconds"] for r in results]
+    stages = {}
+    tokens = {"prompt": 0, "completion": 0}
+    for r in results:
+        for key, stage in r["trace"]["stages"].items():
+            total = stages.setdefault(key, {"count": 0, "total": 0.0})
+            total["count"] += stage["count"]
+            total["total"] += stage["total"]
+        tokens["prompt"] += r["trace"]["tokens"]["prompt"]
+        tokens["completion"] += r["trace"]["tokens"]["completion"]
+
+    return {
+        "runs": len(results),
+        "succeeded": sum(1 for r in results if r["ok"]),
+        "errors": sorted({r["error"] for r in results if r.get("error")}),
+        "wall_seconds": round(wall, 3),
+        "throughput_per_minute": round(len(results) / wall * 60, 3) if wall else None,
+        "latency_seconds": {
+            "mean": round(sum(latencies) / len(latencies), 3) if latencies else None,
+            "p50": percentile(latencies, 50),
+            "p90": percentile(latencies, 90),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": round(max(latencies), 3) if latencies else None,
+        },
+        # Mean time per assessment spent in each traced stage (overlapping stages add up past the latency)
+        "stage_seconds_per_run": {
+            key: {"count": round(s["count"] / len(results), 2), "seconds": round(s["total"] / len(results), 3)}
+            for key, s in sorted(stages.items(), key=lambda item: -item[1]["total"])
+        },
+        "tokens_per_run": {k: round(v / len(results)) for k, v in tokens.items()},
+    }
+
+
+async def main(args) -> dict:
+    from backend.bench.corpus import Corpus
+    from backend.bench.fakes import FakeChatModel, FakeSearchWrapper
+    from backend.metrics import start_trace
+    from backend.scheduler import search_limiter
+    from backend.search import AsyncSearch
+    from backend.shared_resources import browser_pool
+    from backend.fetcher import get_fetcher
+    from backend.content_cache import get_content_cache
+    import backend.search as search_module
+    import backend.graph_agent as graph_agent
+    import backend.agent as agent_module
+
+    corpus = Corpus(args.companies, port=args.port, slow_delay=args.slow_delay)
+    fake_llm = FakeChatModel(latency=args.llm_latency, seconds_per_token=args.seconds_per_token, report_tokens=args.report_tokens)
+
+    def fake_search() -> AsyncSearch:
+        return AsyncSearch(lambda: FakeSearchWrapper(corpus, args.search_latency), cache=None, limiter=search_limiter)
+
+    # Inject the stand-ins where the app builds its clients
+    graph_agent.gemini = lambda temperature, model="gemini-2.0-flash": fake_llm
+    search_module._default_search = fake_search()
+    agent_module.random = ScaledRandom(args.read_delay_scale)
+
+    graph = graph_agent.create_graph()
+
+    async def assess_graph(company) -> dict:
+        inputs = {
+            "company_name": company.name, "address": "1 Industrial Way", "state": company.state,
+            "company_type": company.type, "logs": [], "search_queries": [], "raw_urls": [],
+            "raw_sources": [], "filtered_urls": [], "content": [],
+        }
+        assessment_id = f"bench-{uuid.uuid4().hex}"
+        trace = start_trace(assessment_id)
+        started = time.perf_counter()
+        try:
+            state = await graph.ainvoke(inputs, config={"configurable": {"assessment_id": assessment_id}})
+            ok, error = bool(state.get("report_data")), None
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        return {"seconds": time.perf_counter() - started, "ok": ok, "error": error, "trace": trace.summary()}
+
+    async def assess_agent(company) -> dict:
+        # Skip __init__: it builds real Gemini/CSE clients
+        agent = agent_module.RiskAssessmentAgent.__new__(agent_module.RiskAssessmentAgent)
+        agent.llm = fake_llm
+        agent.async_search = fake_search()
+        trace = start_trace(f"bench-{uuid.uuid4().hex}")
+        started = time.perf_counter()
+        ok, error = False, None
+        try:
+            async for line in agent.run_assessment(company.name, "1 Industrial Way", company.state, company.type):
+                msg = json.loads(line)
+                if msg.get("type") == "result":
+                    ok = True
+                elif msg.get("type") == "error":
+                    error = msg.get("message")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        return {"seconds": time.perf_counter() - started, "ok": ok, "error": error, "trace": trace.summary()}
+
+    targets = {"graph": assess_graph, "agent": assess_agent}
+    selected = list(targets) if args.target == "all" else [args.target]
+
+    sampler = RssSampler()
+    await corpus.start()
+    await browser_pool.start()
+    sampler.start()
+    results = {}
+    try:
+        for name in selected:
+            results[name] = await run_target(name, targets[name], corpus.companies, args)
+    finally:
+        peak_total = await sampler.stop()
+        await browser_pool.stop()
+        fetcher = get_fetcher()
+        if fetcher:
+            await fetcher.close()
+        content_cache = get_content_cache()
+        if content_cache:
+            await content_cache.close()
+        await corpus.stop()
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            **{k: v for k, v in vars(args).items() if k != "out"},
+            "env": {k: os.environ[k] for k in RECORDED_ENV if k in os.environ},
+        },
+        "targets": results,
+        "peak_rss_mb": {"process": peak_self_rss_mb(), "process_and_children": peak_total},
+    }
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    configure_env()
+    report = asyncio.run(main(args))
+    output = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
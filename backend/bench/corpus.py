@@ -0,0 +1,178 @@
+import asyncio
+from aiohttp import web
+
+# Every "site" gets its own loopback address so per-domain logic (pre-filter caps,
+# connection pools, popup caches) sees distinct domains. Linux routes all of 127/8 to lo.
+SHARED_HOSTS = {
+    "registry": "127.0.2.1",   # Server-rendered registry record
+    "reviews": "127.0.2.2",    # Review page behind a cookie/consent modal
+    "news": "127.0.2.3",       # Slow page
+    "profile": "127.0.2.4",    # JS-rendered profile (forces the browser tier)
+    "dictionary": "127.0.2.5", # Noise the pre-filter should drop
+}
+
+WORDS = (
+    "operations revenue customers suppliers compliance audit leadership board growth expansion "
+    "licensing litigation settlement regulator filing quarterly margin headcount contract warranty "
+    "logistics partnership acquisition subsidiary certification inspection complaint rating"
+).split()
+
+
+class Company:
+    def __init__(self, index: int):
+        self.index = index
+        self.slug = f"vendor{index}"
+        self.name = f"Zentrix{index} Fabrication"
+        self.state = "Ohio"
+        self.type = "manufacturing"
+        self.host = f"127.0.1.{index + 1}"   # Official site
+
+
+def paragraphs(company: Company, topic: str, count: int) -> str:
+    """Deterministic filler text that mentions the company (so it survives relevance checks)."""
+    out = []
+    for p in range(count):
+        words = [WORDS[(company.index * 7 + p * 13 + i * 5) % len(WORDS)] for i in range(60)]
+        out.append(f"<p>{company.name} {topic}: {' '.join(words)}.</p>")
+    return "\n".join(out)
+
+
+def page(title: str, body: str, head: str = "") -> str:
+    return f"<!doctype html><html><head><title>{title}</title>{head}</head><body>{body}</body></html>"
+
+
+POPUP = """
+<div id="cookie-consent" class="cookie-banner modal" role="dialog"
+     style="position:fixed;inset:0;background:rgba(0,0,0,.6);z-index:9999;display:flex;align-items:center;justify-content:center">
+  <div style="background:#fff;padding:24px">We use cookies. <button class="accept" onclick="document.getElementById('cookie-consent').remove()">Accept</button>
+  <button aria-label="Close" class="close" onclick="document.getElementById('cookie-consent').remove()">×</button></div>
+</div>
+"""
+
+
+def js_rendered(title: str, html: str) -> str:
+    """A page whose content only exists after scripts run."""
+    encoded = html.replace("\\", "\\\\").replace("`", "\\`")
+    return page(title, f"""
+        <div id="app"></div>
+        <noscript>You need to enable JavaScript to run this app.</noscript>
+        <script>setTimeout(() => {{ document.getElementById('app').innerHTML = `{encoded}`; }}, 300);</script>
+    """)
+
+
+class Corpus:
+    """
+    A fixed set of company web sites served from loopback addresses.
+
+    Per company: an official site (home, about behind a popup, JS-rendered team page,
+    investors, contact), a registry record, a review page with a consent modal, a slow
+    news article and a JS-rendered directory profile, plus a dictionary page as noise.
+    """
+
+    def __init__(self, companies: int, port: int = 8765, slow_delay: float = 1.5):
+        self.companies = [Company(i) for i in range(companies)]
+        self.port = port
+        self.slow_delay = slow_delay
+        self._runners = []
+
+    # --- URLs (what the fake search engine returns) ---
+
+    def url(self, host: str, path: str) -> str:
+        return f"http://{host}:{self.port}{path}"
+
+    def official_pages(self, company: Company) -> list[dict]:
+        return [
+            self.result(self.url(company.host, "/"), f"{company.name} | Official Site", "Industrial fabrication since 1987."),
+            self.result(self.url(company.host, "/about"), f"About {company.name}", "Our history, mission and values."),
+            self.result(self.url(company.host, "/team"), f"{company.name} Leadership Team", "Meet our executives."),
+            self.result(self.url(company.host, "/investors"), f"{company.name} Investor Relations", "Annual reports and filings."),
+        ]
+
+    def third_party_pages(self, company: Company) -> list[dict]:
+        return [
+            self.result(self.url(SHARED_HOSTS["registry"], f"/companies/{company.slug}"), f"{company.name} - Registry Record", f"{company.name}, {company.state} corporation, status active."),
+            self.result(self.url(SHARED_HOSTS["reviews"], f"/reviews/{company.slug}"), f"{company.name} Reviews & Complaints", f"Customers rate {company.name} 3.8/5."),
+            self.result(self.url(SHARED_HOSTS["news"], f"/news/{company.slug}"), f"{company.name} settles supplier lawsuit", f"{company.name} reached a settlement with a former supplier."),
+            self.result(self.url(SHARED_HOSTS["profile"], f"/profile/{company.slug}"), f"{company.name} Company Profile", f"{company.name} employees, revenue and competitors."),
+            self.result(self.url(SHARED_HOSTS["dictionary"], "/define/fabrication"), "Fabrication - Definition & Meaning", "The act of making something."),
+        ]
+
+    @staticmethod
+    def result(link: str, title: str, snippet: str) -> dict:
+        return {"link": link, "title": title, "snippet": snippet}
+
+    def company_for(self, text: str) -> Company | None:
+        lowered = text.lower()
+        # Longest names first so "Zentrix12" never matches "Zentrix1"
+        for company in sorted(self.companies, key=lambda c: -len(c.name)):
+            if company.name.lower() in lowered or company.slug in lowered or company.host in lowered:
+                return company
+        return None
+
+    # --- Server ---
+
+    def _by_host(self, request: web.Request) -> Company | None:
+        host = request.host.split(":")[0]
+        return next((c for c in self.companies if c.host == host), None)
+
+    async def _official(self, request: web.Request) -> web.Response:
+        company = self._by_host(request)
+        if company is None:
+            raise web.HTTPNotFound()
+        path = request.match_info.get("path", "")
+        nav = '<nav><a href="/about">About us</a> <a href="/team">Our Team</a> <a href="/investors">Investors</a> <a href="/contact">Contact</a></nav>'
+        if path == "":
+            html = page(f"{company.name} | Official Site", nav + f"<h1>{company.name}</h1>" + paragraphs(company, "overview", 6))
+        elif path == "about":
+            html = page(f"About {company.name}", nav + POPUP + f"<h1>About {company.name}</h1>" + paragraphs(company, "history", 8))
+        elif path == "team":
+            html = js_rendered(f"{company.name} Team", f"<h1>Leadership</h1>{paragraphs(company, 'leadership', 5)}")
+        elif path == "investors":
+            html = page(f"{company.name} Investors", nav + paragraphs(company, "financials", 7))
+        elif path == "contact":
+            html = page(f"Contact {company.name}", nav + f"<p>{company.name}, 1 Industrial Way, {company.state}</p>")
+        else:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html", headers={"ETag": f'"{company.slug}-{path or "home"}"'})
+
+    async def _shared(self, request: web.Request) -> web.Response:
+        host = request.host.split(":")[0]
+        slug = request.match_info.get("slug", "")
+        company = next((c for c in self.companies if c.slug == slug), None)
+
+        if host == SHARED_HOSTS["dictionary"]:
+            return web.Response(text=page("Definition", "<p>Fabrication: the action or process of manufacturing.</p>" * 20), content_type="text/html")
+        if company is None:
+            raise web.HTTPNotFound()
+        if host == SHARED_HOSTS["registry"]:
+            html = page(f"{company.name} - Registry", paragraphs(company, "registration", 5))
+        elif host == SHARED_HOSTS["reviews"]:
+            html = page(f"{company.name} Reviews", POPUP + paragraphs(company, "reviews", 8))
+        elif host == SHARED_HOSTS["news"]:
+            await asyncio.sleep(self.slow_delay)
+            html = page(f"{company.name} News", paragraphs(company, "news", 6))
+        elif host == SHARED_HOSTS["profile"]:
+            html = js_rendered(f"{company.name} Profile", paragraphs(company, "profile", 6))
+        else:
+            raise web.HTTPNotFound()
+        return web.Response(text=html, content_type="text/html")
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/companies/{slug}", self._shared)
+        app.router.add_get("/reviews/{slug}", self._shared)
+        app.router.add_get("/news/{slug}", self._shared)
+        app.router.add_get("/profile/{slug}", self._shared)
+        app.router.add_get("/define/{word}", self._shared)
+        app.router.add_get("/{path:.*}", self._official)
+
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        for host in [c.host for c in self.companies] + list(SHARED_HOSTS.values()):
+            await web.TCPSite(runner, host, self.port).start()
+        self._runners.append(runner)
+
+    async def stop(self):
+        for runner in self._runners:
+            await runner.cleanup()
+        self._runners = []
@@ -0,0 +1,159 @@
+import re
+import json
+import time
+import asyncio
+from typing import Any
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from backend.metrics import span, record_tokens
+from backend.scheduler import llm_limiter
+from backend.bench.corpus import Corpus
+
+FILLER = "The company shows a stable operating history with moderate exposure to supplier and litigation risk."
+
+
+class FakeSearchWrapper:
+    """Stand-in for GoogleSearchAPIWrapper: answers queries from the corpus after a fixed delay."""
+
+    def __init__(self, corpus: Corpus, latency: float = 0.2):
+        self.corpus = corpus
+        self.latency = latency
+
+    def results(self, query: str, num_results: int) -> list[dict]:
+        time.sleep(self.latency)  # Runs in AsyncSearch's worker threads, like the real client
+        company = self.corpus.company_for(query)
+        if company is None:
+            return []
+        if "site:" in query and company.host in query:
+            # site: queries on the official domain; rotate so each query surfaces a different page first
+            pages = self.corpus.official_pages(company)
+            shift = sum(map(ord, query)) % len(pages)
+            return (pages[shift:] + pages[:shift])[:num_results]
+        if "official" in query.lower() or "homepage" in query.lower():
+            return self.corpus.official_pages(company)[:1][:num_results]
+        pages = self.corpus.third_party_pages(company)
+        shift = sum(map(ord, query)) % len(pages)
+        return (pages[shift:] + pages[:shift])[:num_results]
+
+
+def _estimate_tokens(text: str) -> int:
+    return max(1, len(text) // 4)
+
+
+class FakeChatModel(BaseChatModel):
+    """
+    Deterministic chat model that recognises the pipeline's prompts and answers in the shape
+    each step expects (grades, tool calls for the ReAct agents, notes, the final report).
+
+    Every call sleeps `latency + output_tokens * seconds_per_token` under the shared llm_limiter,
+    so runs exercise the same concurrency control as real Gemini calls. `report_tokens` pads the
+    free-text part of the report.
+    """
+
+    latency: float = 0.5
+    seconds_per_token: float = 0.002
+    report_tokens: int = 600
+    model_name: str = "fake-chat"
+
+    @property
+    def _llm_type(self) -> str:
+        return "fake-chat"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools], **kwargs)
+
+    # --- Responses ---
+
+    def _respond(self, messages, tools: list) -> AIMessage:
+        prompt = "\n".join(m.content if isinstance(m.content, str) else json.dumps(m.content) for m in messages)
+        tool_names = [t["function"]["name"] for t in tools]
+
+        if "UrlGradeBatch" in tool_names:
+            indices = [int(i) for i in re.findall(r"^\s*\[(\d+)\]", prompt, re.MULTILINE)]
+            links = re.findall(r"^\s*\[\d+\]\s+(\S+)", prompt, re.MULTILINE)
+            grades = [
+                {"index": i, "relevant": "/define/" not in link, "reason": "Fake grade"}
+                for i, link in zip(indices, links)
+            ]
+            return self._tool_call("UrlGradeBatch", {"grades": grades})
+
+        if "read_page_tool" in tool_names:
+            # ReAct field agent: dismiss popups, read once, then finish
+            called = [m.name for m in messages if isinstance(m, ToolMessage)]
+            if "close_popup_tool" not in called:
+                return self._tool_call("close_popup_tool", {})
+            if "read_page_tool" not in called:
+                return self._tool_call("read_page_tool", {})
+            return AIMessage(content="Finished reading the page.")
+
+        if "Relevance Filter" in prompt:
+            url = re.search(r"URL to Evaluate:\s*(\S+)", prompt)
+            relevant = url is None or "/define/" not in url.group(1)
+            return AIMessage(content="YES | Fake grade" if relevant else "NO | Dictionary page")
+
+        if "---JSON_START---" in prompt:
+            return AIMessage(content=self._report(prompt))
+
+        if "Condense the source" in prompt:
+            return AIMessage(content="- " + " ".join(FILLER.split()[:40]))
+
+        return AIMessage(content=FILLER)
+
+    def _tool_call(self, name: str, args: dict) -> AIMessage:
+        return AIMessage(content="", tool_calls=[{"name": name, "args": args, "id": f"call_{name}_{time.monotonic_ns()}"}])
+
+    def _report(self, prompt: str) -> str:
+        name = re.search(r'for (?:the company )?"([^"]+)"', prompt)
+        company = name.group(1) if name else "Unknown"
+        repeats = max(1, self.report_tokens // _estimate_tokens(FILLER))
+        markdown = f"## {company}\n\n" + "\n".join(f"- {FILLER}" for _ in range(repeats))
+        report = {
+            "companyInfo": {"companyName": company, "fullAddress": "1 Industrial Way", "businessSector": "Manufacturing", "state": "Ohio"},
+            "riskReport": {
+                "overallRiskScore": 4,
+                "executiveSummary": {"overallRiskRating": "Medium", "keyPositiveFactors": ["Stable history"], "keyNegativeFactors": ["Supplier lawsuit"], "informationGaps": "None"},
+                "riskAssessmentMatrix": {"marketRisk": "Low", "operationalRisk": "Medium", "financialRisk": "Low", "complianceRisk": "Medium", "reputationalRisk": "Medium"},
+            },
+        }
+        return f"{markdown}\n---JSON_START---\n{json.dumps(report)}"
+
+    # --- BaseChatModel plumbing ---
+
+    def _usage(self, messages, message: AIMessage) -> dict:
+        prompt_tokens = sum(_estimate_tokens(str(m.content)) for m in messages)
+        completion_tokens = _estimate_tokens(message.content or json.dumps(message.tool_calls))
+        return {"input_tokens": prompt_tokens, "output_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+    def _delay(self, usage: dict) -> float:
+        return self.latency + usage["output_tokens"] * self.seconds_per_token
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        message = self._respond(messages, kwargs.get("tools", []))
+        message.usage_metadata = self._usage(messages, message)
+        time.sleep(self._delay(message.usage_metadata))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs: Any) -> ChatResult:
+        with span("llm", self.model_name):
+            message = self._respond(messages, kwargs.get("tools", []))
+            message.usage_metadata = self._usage(messages, message)
+            await llm_limiter.run(lambda: asyncio.sleep(self._delay(message.usage_metadata)))
+        record_tokens(self.model_name, message.usage_metadata)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs: Any):
+        with span("llm", self.model_name):
+            message = self._respond(messages, kwargs.get("tools", []))
+            usage = self._usage(messages, message)
+            async with llm_limiter.slot():
+                await asyncio.sleep(self.latency)
+            text = message.content
+            step = 40
+            for start in range(0, len(text), step):
+                piece = text[start:start + step]
+                await asyncio.sleep(_estimate_tokens(piece) * self.seconds_per_token)
+                yield ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            yield ChatGenerationChunk(message=AIMessageChunk(content="", usage_metadata=usage))
+        record_tokens(self.model_name, usage)
@@ -0,0 +1,155 @@
+import os
+import asyncio
+from playwright.async_api import BrowserContext, Page
+
+# Requests of these types never reach the network (stylesheets stay: popup detection and
+# the live previews depend on layout)
+BLOCK_RESOURCE_TYPES = {t.strip().lower() for t in os.getenv("BLOCK_RESOURCE_TYPES", "image,media,font").split(",") if t.strip()}
+
+# Ad networks, analytics/trackers and chat widgets: none of them carry company information
+BLOCKLIST = {
+    # Ads
+    "doubleclick.net", "googlesyndication.com", "googleadservices.com", "adservice.google.com",
+    "amazon-adsystem.com", "adnxs.com", "criteo.com", "criteo.net", "taboola.com", "outbrain.com",
+    "pubmatic.com", "rubiconproject.com", "openx.net", "moatads.com", "ads-twitter.com",
+    "ads.linkedin.com", "bat.bing.com",
+    # Analytics / trackers
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com", "connect.facebook.net",
+    "analytics.twitter.com", "snap.licdn.com", "analytics.tiktok.com", "hotjar.com", "mixpanel.com",
+    "segment.com", "segment.io", "amplitude.com", "fullstory.com", "clarity.ms", "scorecardresearch.com",
+    "quantserve.com", "optimizely.com", "nr-data.net", "hs-analytics.net", "hs-scripts.com",
+    # Chat widgets
+    "intercom.io", "intercomcdn.com", "drift.com", "driftt.com", "zdassets.com", "tawk.to",
+    "livechatinc.com", "crisp.chat",
+}
+BLOCKLIST |= {d.strip().lower() for d in os.getenv("BLOCKLIST_DOMAINS", "").split(",") if d.strip()}
+
+BLOCKLIST_FILE = os.getenv("BLOCKLIST_FILE")
+if BLOCKLIST_FILE and os.path.exists(BLOCKLIST_FILE):
+    # One domain per line; hosts-file lines ("0.0.0.0 ads.example.com") and # comments work too
+    with open(BLOCKLIST_FILE) as f:
+        for line in f:
+            fields = line.split("#", 1)[0].split()
+            if fields:
+                BLOCKLIST.add(fields[-1].lower())
+
+# File extensions of the blocked types, so most of them are refused by URL without a round trip
+TYPE_EXTENSIONS = {
+    "image": ["png", "jpg", "jpeg", "gif", "webp", "avif", "svg", "ico", "bmp"],
+    "media": ["mp4", "webm", "mov", "m4a", "mp3", "ogg", "wav"],
+    "font": ["woff", "woff2", "ttf", "otf", "eot"],
+    "stylesheet": ["css"],
+}
+# CDP resource type names, for the requests whose URL does not give their type away
+CDP_TYPES = {"image": "Image", "media": "Media", "font": "Font", "stylesheet": "Stylesheet"}
+
+
+def compile_patterns(domains: set, types: set) -> list:
+    """Network.setBlockedURLs wildcard patterns for the blocklist and the blocked types' extensions."""
+    patterns = []
+    for domain in sorted(domains):
+        patterns += [f"*://{domain}/*", f"*://*.{domain}/*"]
+    for resource_type in sorted(types):
+        for ext in TYPE_EXTENSIONS.get(resource_type, []):
+            patterns += [f"*.{ext}", f"*.{ext}?*"]
+    return patterns
+
+
+BLOCKED_URL_PATTERNS = compile_patterns(BLOCKLIST, BLOCK_RESOURCE_TYPES)
+# Requests of a blocked type that slipped past the URL patterns pause here (and only these do)
+FETCH_PATTERNS = [{"resourceType": CDP_TYPES[t], "requestStage": "Request"} for t in sorted(BLOCK_RESOURCE_TYPES) if t in CDP_TYPES]
+
+
+class PageBlockStats:
+    def __init__(self):
+        self.requests = 0          # Requests that completed
+        self.bytes = 0             # Bytes they transferred
+        self.blocked_by_url = 0    # Blocklisted domain or blocked extension (refused inside Chromium)
+        self.blocked_by_type = 0   # Blocked type caught by resource type
+
+    @property
+    def blocked(self) -> int:
+        return self.blocked_by_url + self.blocked_by_type
+
+    def as_dict(self) -> dict:
+        return {
+            "requests": self.requests,
+            "bytes": self.bytes,
+            "blocked": self.blocked,
+            "blocked_by_url": self.blocked_by_url,
+            "blocked_by_type": self.blocked_by_type,
+        }
+
+
+class RequestBlocker:
+    """
+    Request blocking for one browser context, enforced inside Chromium over CDP.
+
+    Blocklisted domains and the blocked types' file extensions go to Network.setBlockedURLs,
+    so Chromium refuses them without asking Python. Fetch interception is enabled for the
+    blocked resource types only; everything else (documents, scripts, XHR) never pauses.
+    Create pages with `new_page()` so the rules are in place before the first navigation;
+    pages the site opens itself are covered as soon as they appear.
+
+        blocker = RequestBlocker(context)
+        page = await blocker.new_page()
+        ...
+        blocker.stats(page)  # {"requests", "bytes", "blocked", ...}
+    """
+
+    def __init__(self, context: BrowserContext, enabled: bool = None):
+        self.context = context
+        self.enabled = os.getenv("BLOCK_REQUESTS", "1") == "1" if enabled is None else enabled
+        self._stats = {}      # Page -> PageBlockStats
+        self._attaching = {}  # Page -> task installing its rules
+        if self.enabled:
+            context.on("page", self._on_page)
+
+    async def new_page(self) -> Page:
+        page = await self.context.new_page()
+        if self.enabled:
+            # The "page" event usually fired first; either way the rules are in before we return
+            self._on_page(page)
+            await self._attaching[page]
+        return page
+
+    def _on_page(self, page: Page):
+        if page not in self._attaching:
+            self._attaching[page] = asyncio.ensure_future(self._attach(page))
+
+    async def _attach(self, page: Page):
+        stats = self._stats[page] = PageBlockStats()
+        try:
+            cdp = await self.context.new_cdp_session(page)
+            cdp.on("Network.loadingFinished", lambda event: self._finished(stats, event))
+            cdp.on("Network.loadingFailed", lambda event: self._failed(stats, event))
+            await cdp.send("Network.enable")
+            await cdp.send("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            if FETCH_PATTERNS:
+                cdp.on("Fetch.requestPaused", lambda event: asyncio.ensure_future(self._refuse(cdp, stats, event)))
+                await cdp.send("Fetch.enable", {"patterns": FETCH_PATTERNS})
+        except Exception:
+            pass  # Not Chromium or the page already closed: browse unblocked
+
+    @staticmethod
+    def _finished(stats: PageBlockStats, event: dict):
+        stats.requests += 1
+        stats.bytes += int(event.get("encodedDataLength") or 0)
+
+    @staticmethod
+    def _failed(stats: PageBlockStats, event: dict):
+        if event.get("blockedReason") == "inspector":
+            # Refused by setBlockedURLs; type-blocked requests are counted in _refuse
+            stats.blocked_by_url += 1
+
+    @staticmethod
+    async def _refuse(cdp, stats: PageBlockStats, event: dict):
+        stats.blocked_by_type += 1
+        try:
+            await cdp.send("Fetch.failRequest", {"requestId": event["requestId"], "errorReason": "BlockedByClient"})
+        except Exception:
+            pass
+
+    def stats(self, page: Page) -> dict | None:
+        stats = self._stats.get(page)
+        return stats.as_dict() if stats else None
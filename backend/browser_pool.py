@@ -0,0 +1,178 @@
+import os
+import asyncio
+from contextlib import asynccontextmanager
+from playwright.async_api import async_playwright, Browser, BrowserContext
+
+# Launch flags shared by every pooled browser (headed browsers keep the stealth flag the agents rely on)
+LAUNCH_ARGS = ["--disable-blink-features=AutomationControlled"]
+
+# Modes launched at startup. Field agents run headed unless FIELD_AGENT_HEADLESS=1, so by
+# default both the scouts' headless mode and the field agents' mode are warm.
+DEFAULT_PREWARM = "headless" if os.getenv("FIELD_AGENT_HEADLESS", "0") == "1" else "headless,headed"
+
+
+class _PooledBrowser:
+    """A launched Chromium process plus its usage bookkeeping."""
+
+    def __init__(self, browser: Browser, headless: bool):
+        self.browser = browser
+        self.headless = headless
+        self.uses = 0      # Contexts handed out over the browser's lifetime
+        self.active = 0    # Contexts currently checked out
+        self.retiring = False
+
+    @property
+    def healthy(self) -> bool:
+        return self.browser.is_connected() and not self.retiring
+
+
+class BrowserPool:
+    """
+    Process-wide pool of pre-warmed Chromium browsers.
+
+    Callers never launch browsers themselves; they borrow an isolated BrowserContext:
+
+        async with browser_pool.context(user_agent=...) as context:
+            page = await context.new_page()
+
+    The context is always closed on exit (even on error/cancellation), browsers are
+    replaced when they disconnect and recycled after `recycle_after` contexts.
+    """
+
+    def __init__(self, size: int = None, max_contexts: int = None, recycle_after: int = None, headed_slow_mo: int = 50):
+        self.size = size or int(os.getenv("BROWSER_POOL_SIZE", "2"))
+        self.max_contexts = max_contexts or int(os.getenv("BROWSER_POOL_MAX_CONTEXTS", "12"))
+        self.recycle_after = recycle_after or int(os.getenv("BROWSER_POOL_RECYCLE_AFTER", "50"))
+        self.headed_slow_mo = headed_slow_mo
+        self.prewarm_modes = [m.strip() for m in os.getenv("BROWSER_POOL_PREWARM", DEFAULT_PREWARM).split(",") if m.strip()]
+
+        self._playwright = None
+        self._browsers: list[_PooledBrowser] = []
+        self._start_lock = asyncio.Lock()
+        # Guards the bookkeeping only; Chromium launches and closes happen outside it
+        self._lock = asyncio.Lock()
+        self._changed = asyncio.Condition(self._lock)
+        self._launching = {True: 0, False: 0}   # headless -> launches in flight (reserved slots)
+        self._slots = asyncio.Semaphore(self.max_contexts)
+
+    @property
+    def started(self) -> bool:
+        return self._playwright is not None
+
+    async def start(self, prewarm: bool = True):
+        """Starts Playwright and pre-launches `size` browsers of each BROWSER_POOL_PREWARM mode."""
+        async with self._start_lock:
+            if self.started:
+                return
+            self._playwright = await async_playwright().start()
+            if prewarm:
+                modes = [mode != "headed" for mode in self.prewarm_modes for _ in range(self.size)]
+                launched = await asyncio.gather(*(self._launch(headless) for headless in modes), return_exceptions=True)
+                async with self._lock:
+                    for result in launched:
+                        if isinstance(result, Exception):
+                            # E.g. headed mode on a server without a display: launched on demand instead
+                            print(f"Browser pool: prewarm launch failed: {result}")
+                        else:
+                            self._browsers.append(result)
+
+    async def stop(self):
+        """Closes every browser and shuts Playwright down."""
+        if not self.started:
+            return
+        async with self._lock:
+            browsers, self._browsers = self._browsers, []
+        for pooled in browsers:
+            await self._close(pooled)
+        await self._playwright.stop()
+        self._playwright = None
+
+    async def _launch(self, headless: bool) -> _PooledBrowser:
+        browser = await self._playwright.chromium.launch(
+            headless=headless,
+            slow_mo=0 if headless else self.headed_slow_mo,
+            args=LAUNCH_ARGS,
+        )
+        return _PooledBrowser(browser, headless)
+
+    async def _close(self, pooled: _PooledBrowser):
+        try:
+            await pooled.browser.close()
+        except Exception:
+            pass
+
+    def _checkout(self, pooled: _PooledBrowser) -> _PooledBrowser:
+        pooled.uses += 1
+        pooled.active += 1
+        if pooled.uses >= self.recycle_after:
+            # Stop handing it out; it is closed once its last context is released
+            pooled.retiring = True
+        return pooled
+
+    async def _acquire_browser(self, headless: bool) -> _PooledBrowser:
+        async with self._changed:
+            while True:
+                # Health check: drop browsers that crashed or were disconnected
+                for pooled in list(self._browsers):
+                    if not pooled.browser.is_connected():
+                        self._browsers.remove(pooled)
+
+                candidates = [b for b in self._browsers if b.headless == headless and b.healthy]
+                if len(candidates) + self._launching[headless] < self.size:
+                    # Reserve the slot, then launch without holding the lock
+                    self._launching[headless] += 1
+                    break
+                if candidates:
+                    return self._checkout(min(candidates, key=lambda b: b.active))
+                # Every slot is a launch in flight: wait for one to land
+                await self._changed.wait()
+
+        try:
+            pooled = await self._launch(headless)
+        except BaseException:
+            async with self._changed:
+                self._launching[headless] -= 1
+                self._changed.notify_all()
+            raise
+        async with self._changed:
+            self._launching[headless] -= 1
+            self._browsers.append(pooled)
+            self._changed.notify_all()
+            return self._checkout(pooled)
+
+    async def _release_browser(self, pooled: _PooledBrowser):
+        async with self._lock:
+            pooled.active -= 1
+            doomed = pooled.retiring and pooled.active <= 0
+            if doomed and pooled in self._browsers:
+                self._browsers.remove(pooled)
+        if doomed:
+            await self._close(pooled)
+
+    @asynccontextmanager
+    async def context(self, headless: bool = True, **context_kwargs) -> BrowserContext:
+        """Borrows an isolated BrowserContext; `context_kwargs` go to `browser.new_context`."""
+        if not self.started:
+            await self.start(prewarm=False)
+
+        async with self._slots:
+            pooled = await self._acquire_browser(headless)
+            context = None
+            try:
+                context = await pooled.browser.new_context(**context_kwargs)
+                yield context
+            finally:
+                if context is not None:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+                await self._release_browser(pooled)
+
+    def stats(self) -> dict:
+        return {
+            "browsers": len(self._browsers),
+            "active_contexts": sum(b.active for b in self._browsers),
+            "max_contexts": self.max_contexts,
+            "healthy": sum(1 for b in self._browsers if b.healthy),
+        }
@@ -0,0 +1,147 @@
+import os
+import json
+import time
+import asyncio
+import sqlite3
+import threading
+
+# All on-disk caches live in one SQLite file (one table per cache)
+CACHE_DIR = os.getenv("CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+# Eviction scans the table, so it runs once per this many writes (caps may be overshot by that much)
+EVICT_EVERY = 32
+
+
+class SqliteCache:
+    """
+    Small persistent key/value cache on SQLite with TTL and LRU eviction.
+
+    Values are JSON-encoded. An entry younger than `ttl` is fresh; one older than
+    `ttl` but younger than `ttl + max_stale` is returned as stale (callers may
+    serve it while revalidating); anything older is treated as a miss and dropped.
+    The table is kept under `max_entries` rows and `max_bytes` of values by
+    evicting the least recently read entries.
+
+    Async code should use the `a*` variants, which run the SQLite I/O in a worker
+    thread instead of on the event loop.
+    """
+
+    def __init__(self, name: str, ttl: float, max_stale: float = 0, max_entries: int = None, max_bytes: int = None, path: str = None):
+        self.name = name
+        self.ttl = ttl
+        self.max_stale = max_stale
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._writes = 0
+
+        path = path or os.path.join(CACHE_DIR, "cache.sqlite3")
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Shared between the event loop and worker threads; all access goes through the lock
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            f"CREATE TABLE IF NOT EXISTS {name} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, size INTEGER NOT NULL, "
+            "created REAL NOT NULL, accessed REAL NOT NULL)"
+        )
+        self._db.execute(f"CREATE INDEX IF NOT EXISTS {name}_accessed ON {name} (accessed)")
+
+    def get(self, key: str):
+        """Returns (value, is_fresh), or None on a miss."""
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(f"SELECT value, created FROM {self.name} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            value, created = row
+            age = now - created
+            if age > self.ttl + self.max_stale:
+                self._db.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+
+            self._db.execute(f"UPDATE {self.name} SET accessed = ? WHERE key = ?", (now, key))
+
+        fresh = age <= self.ttl
+        if fresh:
+            self.hits += 1
+        else:
+            self.stale_hits += 1
+        return json.loads(value), fresh
+
+    def set(self, key: str, value):
+        encoded = json.dumps(value)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                f"INSERT OR REPLACE INTO {self.name} (key, value, size, created, accessed) VALUES (?, ?, ?, ?, ?)",
+                (key, encoded, len(encoded), now, now)
+            )
+            self._writes += 1
+            if self._writes % EVICT_EVERY == 0:
+                self._evict()
+
+    def touch(self, key: str):
+        """Marks an entry as freshly validated without rewriting its value."""
+        now = time.time()
+        with self._lock:
+            self._db.execute(f"UPDATE {self.name} SET created = ?, accessed = ? WHERE key = ?", (now, now, key))
+
+    def delete(self, key: str):
+        with self._lock:
+            self._db.execute(f"DELETE FROM {self.name} WHERE key = ?", (key,))
+
+    async def aget(self, key: str):
+        return await asyncio.to_thread(self.get, key)
+
+    async def aset(self, key: str, value):
+        await asyncio.to_thread(self.set, key, value)
+
+    async def atouch(self, key: str):
+        await asyncio.to_thread(self.touch, key)
+
+    async def adelete(self, key: str):
+        await asyncio.to_thread(self.delete, key)
+
+    def _evict(self):
+        if self.max_entries:
+            count = self._db.execute(f"SELECT COUNT(*) FROM {self.name}").fetchone()[0]
+            if count > self.max_entries:
+                excess = count - self.max_entries
+                self._db.execute(
+                    f"DELETE FROM {self.name} WHERE key IN (SELECT key FROM {self.name} ORDER BY accessed LIMIT ?)",
+                    (excess,)
+                )
+                self.evictions += excess
+
+        if self.max_bytes:
+            total = self._db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {self.name}").fetchone()[0]
+            if total > self.max_bytes:
+                # Walk from least to most recently used until we are back under the cap
+                doomed = []
+                for key, size in self._db.execute(f"SELECT key, size FROM {self.name} ORDER BY accessed"):
+                    if total <= self.max_bytes:
+                        break
+                    doomed.append((key,))
+                    total -= size
+                self._db.executemany(f"DELETE FROM {self.name} WHERE key = ?", doomed)
+                self.evictions += len(doomed)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._db.execute(f"SELECT COUNT(*), COALESCE(SUM(size), 0) FROM {self.name}").fetchone()
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
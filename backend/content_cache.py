@@ -0,0 +1,122 @@
+import os
+import hashlib
+import aiohttp
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+from backend.cache import SqliteCache
+
+# Query parameters that never change page content
+TRACKING_PARAMS = {"gclid", "fbclid", "msclkid", "mc_cid", "mc_eid", "ref", "ref_src"}
+
+
+def canonical_url(url: str) -> str:
+    """Normalizes a URL so trivially different links share one cache entry."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower() or "https"
+    host = (parts.hostname or "").lower()
+    if parts.port and (scheme, parts.port) not in (("http", 80), ("https", 443)):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip("/") or "/"
+    query = urlencode(sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    ))
+    return urlunsplit((scheme, host, path, query, ""))
+
+
+class ContentCache:
+    """
+    Cache of extracted page text keyed by canonical URL.
+
+    Entries remember the ETag/Last-Modified the page was served with. Within `ttl`
+    a hit is served as-is; after that (within `max_stale`) a conditional GET asks
+    the origin whether the page changed, and a 304 renews the entry without
+    rendering anything. Revalidations share one lazily created HTTP session (kept-alive
+    connections, no new TLS handshake per 304); close() it on shutdown.
+    Total stored text is capped by `max_bytes` (LRU).
+    """
+
+    def __init__(self, ttl: float = None, max_stale: float = None, max_bytes: int = None, revalidate_timeout: float = 5):
+        self.store = SqliteCache(
+            "page_content",
+            ttl=ttl or float(os.getenv("CONTENT_CACHE_TTL", str(6 * 3600))),
+            max_stale=max_stale or float(os.getenv("CONTENT_CACHE_MAX_STALE", str(30 * 24 * 3600))),
+            max_bytes=max_bytes or int(os.getenv("CONTENT_CACHE_MAX_BYTES", str(200 * 1024 * 1024))),
+        )
+        self.revalidate_timeout = revalidate_timeout
+        self.revalidated = 0
+        self._session = None
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit_per_host=6, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.revalidate_timeout),
+            )
+        return self._session
+
+    async def get(self, url: str) -> str | None:
+        """Returns cached text for `url` if it is (or can be confirmed) fresh."""
+        key = canonical_url(url)
+        cached = await self.store.aget(key)
+        if cached is None:
+            return None
+
+        entry, fresh = cached
+        if fresh:
+            return entry["text"]
+
+        if await self._not_modified(url, entry):
+            await self.store.atouch(key)
+            self.revalidated += 1
+            return entry["text"]
+
+        await self.store.adelete(key)
+        return None
+
+    async def _not_modified(self, url: str, entry: dict) -> bool:
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        if not headers:
+            return False  # No validators: only a full render can tell
+
+        try:
+            async with self._get_session().get(url, headers=headers, allow_redirects=True) as response:
+                return response.status == 304
+        except Exception:
+            return False
+
+    async def put(self, url: str, text: str, headers: dict | None = None):
+        """Stores extracted text with the validators from the page's response headers."""
+        if not text:
+            return
+        headers = {k.lower(): v for k, v in (headers or {}).items()}
+        await self.store.aset(canonical_url(url), {
+            "text": text,
+            "hash": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+        })
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "revalidated": self.revalidated}
+
+
+_content_cache = None
+
+
+def get_content_cache() -> ContentCache | None:
+    """Shared page-text cache, or None when CONTENT_CACHE_TTL=0."""
+    global _content_cache
+    if float(os.getenv("CONTENT_CACHE_TTL", "1")) <= 0:
+        return None
+    if _content_cache is None:
+        _content_cache = ContentCache()
+    return _content_cache
@@ -0,0 +1,149 @@
+import os
+import re
+import asyncio
+import aiohttp
+from bs4 import BeautifulSoup
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Below this much body text a page is probably rendered client-side
+MIN_TEXT_CHARS = int(os.getenv("FETCH_MIN_TEXT_CHARS", "500"))
+MAX_BODY_BYTES = 3 * 1024 * 1024
+
+HTML_TYPES = ("text/html", "application/xhtml+xml", "text/plain")
+CHALLENGE_MARKERS = re.compile(
+    r"just a moment\.\.\.|cf-chl|challenge-platform|attention required|verify you are human|"
+    r"are you a robot|captcha|access denied|request unsuccessful|pardon our interruption",
+    re.IGNORECASE
+)
+NOSCRIPT_WALL = re.compile(r"(enable|turn on) javascript|javascript is (disabled|required)", re.IGNORECASE)
+
+try:
+    import lxml  # noqa: F401
+    PARSER = "lxml"
+except ImportError:
+    PARSER = "html.parser"
+
+
+class FetchResult:
+    def __init__(self, url: str, text: str, headers: dict):
+        self.url = url
+        self.text = text
+        self.headers = headers
+
+
+def extract_text(html: str) -> tuple[str, str]:
+    """Returns (visible text, noscript text) of an HTML document."""
+    soup = BeautifulSoup(html, PARSER)
+    noscript = " ".join(tag.get_text(" ") for tag in soup.find_all("noscript"))
+    for tag in soup(["script", "style", "noscript", "template", "svg", "iframe"]):
+        tag.decompose()
+    body = soup.body or soup
+    return " ".join(body.get_text(" ").split()), " ".join(noscript.split())
+
+
+def escalation_reason(status: int, html: str, text: str, noscript: str) -> str | None:
+    """Why a plain HTTP fetch isn't good enough (None if it is)."""
+    if status in (401, 403, 429, 503):
+        return "blocked"
+    if status >= 400:
+        return "http-error"
+    if CHALLENGE_MARKERS.search(html[:20000]) and len(text) < 4 * MIN_TEXT_CHARS:
+        return "challenge"
+    if len(text) < MIN_TEXT_CHARS:
+        return "noscript" if NOSCRIPT_WALL.search(noscript or text) else "thin"
+    return None
+
+
+class HttpFetcher:
+    """
+    Tier 1 of page fetching: a pooled keep-alive HTTP GET with BeautifulSoup extraction.
+
+    `fetch` returns a FetchResult for server-rendered pages and None when the page looks
+    script-rendered or blocked, in which case the caller escalates to Playwright (tier 2).
+    Counters record how many fetches each tier handled and why pages were escalated.
+    """
+
+    def __init__(self, timeout: float = None, max_connections: int = None):
+        self.timeout = timeout or float(os.getenv("FETCH_HTTP_TIMEOUT", "10"))
+        self.max_connections = max_connections or int(os.getenv("FETCH_HTTP_MAX_CONNECTIONS", "50"))
+        self._session = None
+
+        self.http_count = 0
+        self.browser_count = 0
+        self.escalations = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections, limit_per_host=6, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml;q=0.9,*/*;q=0.8", "Accept-Language": "en-US,en;q=0.9"},
+            )
+        return self._session
+
+    def _escalate(self, reason: str):
+        self.browser_count += 1
+        self.escalations[reason] = self.escalations.get(reason, 0) + 1
+
+    async def fetch(self, url: str) -> FetchResult | None:
+        try:
+            async with self._get_session().get(url, allow_redirects=True) as response:
+                content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                if content_type and content_type not in HTML_TYPES:
+                    self._escalate("content-type")
+                    return None
+                # content.read(n) returns what is buffered so far; read chunks until EOF or the cap
+                body = bytearray()
+                async for chunk in response.content.iter_chunked(64 * 1024):
+                    body += chunk
+                    if len(body) >= MAX_BODY_BYTES:
+                        del body[MAX_BODY_BYTES:]
+                        break
+                body = bytes(body)
+                charset = response.charset or "utf-8"
+                status = response.status
+                headers = dict(response.headers)
+                final_url = str(response.url)
+        except Exception:
+            self._escalate("error")
+            return None
+
+        try:
+            html = body.decode(charset, errors="replace")
+        except LookupError:
+            html = body.decode("utf-8", errors="replace")
+        if content_type == "text/plain":
+            text, noscript = " ".join(html.split()), ""
+        else:
+            # Parsing is CPU-bound; keep it off the event loop
+            text, noscript = await asyncio.to_thread(extract_text, html)
+
+        reason = escalation_reason(status, html, text, noscript)
+        if reason:
+            self._escalate(reason)
+            return None
+
+        self.http_count += 1
+        return FetchResult(final_url, text, headers)
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> dict:
+        return {"http": self.http_count, "browser": self.browser_count, "escalations": dict(self.escalations)}
+
+
+_fetcher = None
+
+
+def get_fetcher() -> HttpFetcher | None:
+    """Shared HTTP fast-path fetcher, or None when FETCH_HTTP_FIRST=0."""
+    global _fetcher
+    if os.getenv("FETCH_HTTP_FIRST", "1") == "0":
+        return None
+    if _fetcher is None:
+        _fetcher = HttpFetcher()
+    return _fetcher
@@ -8,7 +8,7 @@ async def find_url():
     agent = RiskAssessmentAgent()
     query = "BalancedTrust Florida"
     print(f"Searching for: {query}")
-    results = agent.search.results(query, 5)
+    results = await agent.async_search.results(query, 5)
     for i, r in enumerate(results):
         print(f"{i+1}. {r.get('title')} - {r.get('link')}")
 
@@ -4,11 +4,28 @@ import asyncio
 import random
 from typing import TypedDict, List, Annotated
 from langgraph.graph import StateGraph, END
-from langchain_google_genai import ChatGoogleGenerativeAI
-from langchain_community.utilities import GoogleSearchAPIWrapper
+from backend.search import get_search
+from backend.metrics import span, traced
+from backend.cache import SqliteCache
+from backend.models import UrlGradeBatch
+from backend.json_stream import JsonSectionStream
 from langchain_core.prompts import PromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
-from playwright.async_api import async_playwright
+from langchain_core.runnables import RunnableConfig
+from backend.shared_resources import browser_pool
+
+def latest_logs(existing: list, new: list) -> list:
+    """
+    Reducer for `logs`. It does not accumulate: nodes return only their new log events and
+    state keeps just that latest batch, as {"seq": n, "event": json_str} numbered on from the
+    previous batch. The full, replayable log is AssessmentStore's (execute_assessment forwards
+    each entry once, by seq), so the checkpointed state stays small and each update is O(batch).
+    """
+    existing = existing or []
+    if not new:
+        return existing  # Keep the last batch: its seq is the running counter
+    start = existing[-1]["seq"] + 1 if existing else 0
+    return [{"seq": start + i, "event": event} for i, event in enumerate(new)]
 
 # Define the state of our agent
 class AgentState(TypedDict):
@@ -20,14 +37,54 @@ class AgentState(TypedDict):
     # Data accumulation
     search_queries: List[str]
     raw_urls: List[str]
+    raw_sources: List[dict] # {"link", "title", "snippet"} per raw url
     filtered_urls: List[str]
     content: List[str]
-    logs: List[str] # For streaming to frontend
+    logs: Annotated[List[dict], latest_logs] # Latest numbered batch, for streaming to frontend
     
     # Final Output
     summary: str
     report_data: dict
 
+# --- LLM ---
+
+# Built in backend/llm.py so the graph and RiskAssessmentAgent share one limited client
+from backend.llm import gemini
+
+# --- Search helpers ---
+
+def discovery_query(company: str, location: str) -> str:
+    return f"{company} {location} official site"
+
+def broad_queries(company: str, location: str, ctype: str) -> List[str]:
+    return [
+        f"{company} {location} {ctype} company profile",
+        f"{company} {location} {ctype} reviews complaints",
+        f"{company} {location} {ctype} lawsuits legal",
+        f"site:linkedin.com/company {company} {ctype}",
+        f"site:opencorporates.com {company} {location}",
+    ]
+
+def site_queries(official_site: str) -> List[str]:
+    from urllib.parse import urlparse
+    domain = urlparse(official_site).netloc.replace("www.", "")
+    return [
+        f"site:{domain} leadership team",
+        f"site:{domain} about us",
+        f"site:{domain} investor relations",
+    ]
+
+def pick_official_site(results: list) -> str | None:
+    for r in results:
+        link = r.get("link", "")
+        if "linkedin" not in link and "facebook" not in link:
+            return link
+    return None
+
+def source_of(result: dict) -> dict:
+    link = result.get("link")
+    return {"link": link, "title": result.get("title", ""), "snippet": result.get("snippet", "")}
+
 # --- Nodes ---
 
 async def research_node(state: AgentState):
@@ -36,65 +93,176 @@ async def research_node(state: AgentState):
     location = state["state"]
     
     # Log
-    logs = state.get("logs", [])
+    logs = []
     logs.append(json.dumps({"type": "log", "message": f"🕵️‍♀️ Gatherer Agent: Scouting for {company} in {location}..."}))
     
-    search = GoogleSearchAPIWrapper(
-        google_api_key=os.getenv("GOOGLE_API_KEY"),
-        google_cse_id=os.getenv("GOOGLE_CSE_ID")
+    search = get_search()
+    ctype = state["company_type"]
+    
+    # 1. Discovery Phase (Official Site) runs concurrently with the broad search
+    discovery, broad = await asyncio.gather(
+        search.results(discovery_query(company, location), 3),
+        search.results_many(broad_queries(company, location, ctype), 5),
+        return_exceptions=True
     )
     
-    # 1. Discovery Phase (Official Site)
     official_site = None
-    try:
-        results = search.results(f"{company} {location} official site", 3)
-        for r in results:
-            link = r.get("link", "")
-            if "linkedin" not in link and "facebook" not in link:
-                official_site = link
-                logs.append(json.dumps({"type": "log", "message": f"🎯 Gatherer Agent: Found official site candidate: {official_site}"}))
-                break
-    except Exception as e:
-        logs.append(json.dumps({"type": "log", "message": f"⚠️ Gatherer Agent: Discovery error: {e}"}))
+    if isinstance(discovery, Exception):
+        logs.append(json.dumps({"type": "log", "message": f"⚠️ Gatherer Agent: Discovery error: {discovery}"}))
+    else:
+        official_site = pick_official_site(discovery)
+        if official_site:
+            logs.append(json.dumps({"type": "log", "message": f"🎯 Gatherer Agent: Found official site candidate: {official_site}"}))
 
-    # 2. Broad Search
-    ctype = state["company_type"]
-    queries = [
-        f"{company} {location} {ctype} company profile",
-        f"{company} {location} {ctype} reviews complaints",
-        f"{company} {location} {ctype} lawsuits legal",
-        f"site:linkedin.com/company {company} {ctype}",
-        f"site:opencorporates.com {company} {location}",
-    ]
-    
+    # 2. Targeted Search on the official domain (depends on discovery)
     if official_site:
-        from urllib.parse import urlparse
-        domain = urlparse(official_site).netloc.replace("www.", "")
-        queries.extend([
-            f"site:{domain} leadership team",
-            f"site:{domain} about us",
-            f"site:{domain} investor relations",
-        ])
-
-    raw_urls = []
+        broad.extend(await search.results_many(site_queries(official_site), 5))
+
+    # Deduplicate (keeping search order) and remember title/snippet for the filter
+    sources = {}
     if official_site:
-        raw_urls.append(official_site)
+        sources[official_site] = source_of(next(r for r in discovery if r.get("link") == official_site))
 
-    for q in queries:
-        try:
-            results = search.results(q, 5)
-            for r in results:
-                link = r.get("link")
-                if link:
-                    raw_urls.append(link)
-        except Exception:
-            pass
+    for results in broad:
+        if isinstance(results, Exception):
+            continue
+        for r in results:
+            link = r.get("link")
+            if link and link not in sources:
+                sources[link] = source_of(r)
             
-    # Deduplicate
-    raw_urls = list(set(raw_urls))
+    raw_urls = list(sources)
     logs.append(json.dumps({"type": "log", "message": f"📚 Gatherer Agent: Collected {len(raw_urls)} potential sources."}))
     
-    return {"raw_urls": raw_urls, "logs": logs}
+    return {"raw_urls": raw_urls, "raw_sources": list(sources.values()), "logs": logs}
+
+GRADER_MODEL = "gemini-2.0-flash"
+# Bump whenever a grading prompt changes, so verdicts given to the old wording are not reused
+GRADE_PROMPT_VERSION = 2
+
+_grade_cache = None
+
+def get_grade_cache():
+    """Persistent memo of relevance grades, or None when GRADE_CACHE_TTL=0."""
+    global _grade_cache
+    ttl = float(os.getenv("GRADE_CACHE_TTL", str(7 * 24 * 3600)))
+    if ttl <= 0:
+        return None
+    if _grade_cache is None:
+        _grade_cache = SqliteCache(
+            "url_grades",
+            ttl=ttl,
+            max_entries=int(os.getenv("GRADE_CACHE_MAX_ENTRIES", "20000")),
+        )
+    return _grade_cache
+
+def grade_cache_key(company: str, location: str, ctype: str, src: dict, prompt: str) -> str:
+    """
+    Memo key for one source's grade under `prompt` ("url": grade_url, "batch": the batch grader).
+    Covers everything that goes into that prompt (the batch prompt also shows the SERP title
+    and snippet), the prompt version and the model that answered it.
+    """
+    fields = [company, location, ctype]
+    if prompt == "batch":
+        fields += [src.get("title") or "", src.get("snippet") or ""]
+    return json.dumps([GRADER_MODEL, prompt, GRADE_PROMPT_VERSION] + [" ".join(f.lower().split()) for f in fields] + [src["link"]])
+
+# "batch" grades every candidate in one structured LLM call; "parallel" makes one call per URL
+GRADING_MODE = os.getenv("FILTER_GRADING_MODE", "batch")
+
+SOCIAL_DOMAINS = {"facebook.com", "twitter.com", "x.com", "instagram.com", "linkedin.com", "youtube.com", "tiktok.com", "pinterest.com", "reddit.com"}
+DICTIONARY_DOMAINS = {"merriam-webster.com", "dictionary.com", "dictionary.cambridge.org", "wiktionary.org", "thefreedictionary.com", "collinsdictionary.com", "vocabulary.com", "urbandictionary.com"}
+NAME_STOPWORDS = {"the", "and", "inc", "llc", "ltd", "corp", "corporation", "company", "co", "group", "holdings", "of"}
+MAX_URLS_PER_DOMAIN = 4 # Official home page + about/leadership/investor hits
+
+def _domain(url: str) -> str:
+    from urllib.parse import urlparse
+    host = (urlparse(url).hostname or "").lower()
+    return host[4:] if host.startswith("www.") else host
+
+def _tokens(text: str) -> set:
+    import re
+    return set(re.findall(r"[a-z0-9]+", text.lower()))
+
+class SourcePrefilter:
+    """
+    Rejects obvious junk without an LLM call: social/dictionary home pages, more than
+    MAX_URLS_PER_DOMAIN hits on one domain, and hits whose title, snippet and URL share
+    no token with the company name. Stateful (per-domain counts), so sources can be
+    checked one at a time as they arrive.
+    """
+
+    def __init__(self, company: str):
+        self.name_tokens = _tokens(company) - NAME_STOPWORDS
+        self.per_domain = {}
+
+    def check(self, src: dict) -> str | None:
+        """Returns the rejection reason, or None if the source should be graded."""
+        from urllib.parse import urlparse
+        url = src["link"]
+        domain = _domain(url)
+        path = urlparse(url).path.strip("/")
+
+        if any(domain == d or domain.endswith("." + d) for d in DICTIONARY_DOMAINS):
+            return "dictionary site"
+        if any(domain == d or domain.endswith("." + d) for d in SOCIAL_DOMAINS) and path in ("", "home", "login"):
+            return "social home page"
+        if self.per_domain.get(domain, 0) >= MAX_URLS_PER_DOMAIN:
+            return "duplicate domain"
+        if self.name_tokens and (src.get("title") or src.get("snippet")):
+            seen = _tokens(" ".join([src.get("title", ""), src.get("snippet", ""), url]))
+            if not self.name_tokens & seen:
+                return "no name overlap"
+
+        self.per_domain[domain] = self.per_domain.get(domain, 0) + 1
+        return None
+
+def prefilter_sources(sources: list, company: str):
+    """Runs SourcePrefilter over a list. Returns (kept, [(url, reason), ...])."""
+    prefilter = SourcePrefilter(company)
+    kept, rejected = [], []
+    for src in sources:
+        reason = prefilter.check(src)
+        if reason:
+            rejected.append((src["link"], reason))
+        else:
+            kept.append(src)
+    return kept, rejected
+
+def grader_llm():
+    return gemini(temperature=0, model=GRADER_MODEL)
+
+async def grade_url(llm, company: str, location: str, ctype: str, url: str) -> str:
+    """Grades one URL; returns "YES | reason" or "NO | reason"."""
+    try:
+        prompt = f"""
+        You are a strict Relevance Filter.
+        Target: "{company}" located in "{location}" doing business in "{ctype}".
+        
+        URL to Evaluate: {url}
+        
+        Is this URL likely to contain relevant information about THIS SPECIFIC company?
+        - If it's a different company with the same name (e.g. manufacturing vs real estate), REJECT it.
+        - If it's a general dictionary/social media home page, REJECT it.
+        - If it's a specific profile, news article, or official site, ACCEPT it.
+        
+        Reply in this format: "YES | [Reasoning]" or "NO | [Reasoning]"
+        """
+        response = await llm.ainvoke(prompt)
+        return response.content.strip()
+    except:
+        return "NO | Error"
+
+def parse_grade(result: str):
+    """Returns (approved, reason) for a "YES | reason" style grade."""
+    if "|" in result:
+        grade, reason = result.split("|", 1)
+        grade = grade.strip().upper()
+        reason = reason.strip()
+    else:
+        grade = result.strip().upper()
+        reason = "No reason provided"
+    return "YES" in grade, reason
 
 async def filter_node(state: AgentState):
     """The Filter: Grades relevance of URLs using LLM."""
@@ -105,49 +273,87 @@ async def filter_node(state: AgentState):
     location = state["state"]
     ctype = state["company_type"]
     
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=0)
+    llm = grader_llm()
+    grade_cache = get_grade_cache()
     
-    # Batch process or process in parallel? For speed, let's do a single batch prompt if list is small, 
-    # or parallel calls. Parallel calls are better for independent reasoning.
+    # Batch process or process in parallel? Batch mode (default) grades everything in one
+    # structured call; parallel mode keeps one independent call per URL.
     
-    async def grade_url(url):
+    async def grade_batch(batch):
+        listing = "\n".join(
+            f"[{i}] {src['link']}\n    Title: {src.get('title', '')}\n    Snippet: {src.get('snippet', '')}"
+            for i, src in enumerate(batch)
+        )
+        prompt = f"""
+        You are a strict Relevance Filter.
+        Target: "{company}" located in "{location}" doing business in "{ctype}".
+        
+        Search results to evaluate:
+        {listing}
+        
+        For EACH result, decide whether it is likely to contain relevant information about THIS SPECIFIC company.
+        - If it's a different company with the same name (e.g. manufacturing vs real estate), REJECT it.
+        - If it's a general dictionary/social media home page, REJECT it.
+        - If it's a specific profile, news article, or official site, ACCEPT it.
+        
+        Return one grade per result, using the result's [index].
+        """
         try:
-            prompt = f"""
-            You are a strict Relevance Filter.
-            Target: "{company}" located in "{location}" doing business in "{ctype}".
-            
-            URL to Evaluate: {url}
-            
-            Is this URL likely to contain relevant information about THIS SPECIFIC company?
-            - If it's a different company with the same name (e.g. manufacturing vs real estate), REJECT it.
-            - If it's a general dictionary/social media home page, REJECT it.
-            - If it's a specific profile, news article, or official site, ACCEPT it.
-            
-            Reply in this format: "YES | [Reasoning]" or "NO | [Reasoning]"
-            """
-            response = await llm.ainvoke(prompt)
-            return url, response.content.strip()
-        except:
-            return url, "NO | Error"
+            verdict = await llm.with_structured_output(UrlGradeBatch).ainvoke(prompt)
+            by_index = {g.index: g for g in verdict.grades}
+        except Exception:
+            by_index = {}
+        
+        results = []
+        for i, src in enumerate(batch):
+            g = by_index.get(i)
+            # Same "YES | reason" shape as the per-URL grader
+            results.append((src["link"], f"{'YES' if g.relevant else 'NO'} | {g.reason}" if g else "NO | Error"))
+        return results
 
+    sources = state.get("raw_sources") or [{"link": url} for url in state["raw_urls"]]
+    
+    # Cheap local pre-filter: obvious junk never reaches the LLM
+    sources, rejected = prefilter_sources(sources, company)
+    if rejected:
+        logs.append(json.dumps({"type": "log", "message": f"🧹 Filter Agent: Pre-filter dropped {len(rejected)} obvious non-matches."}))
+    
     # Limit to checking top 15 raw urls to save time
-    urls_to_check = state["raw_urls"][:15]
+    sources_to_check = sources[:15]
     
-    # Run grading in parallel
-    tasks = [grade_url(url) for url in urls_to_check]
-    results = await asyncio.gather(*tasks)
+    # Memoized grades first; only never-graded URLs cost an LLM call
+    prompt_kind = "url" if GRADING_MODE == "parallel" else "batch"
+    keys = {src["link"]: grade_cache_key(company, location, ctype, src, prompt_kind) for src in sources_to_check}
+    grades = {}
+    pending = []
+    for src in sources_to_check:
+        cached = await grade_cache.aget(keys[src["link"]]) if grade_cache else None
+        if cached:
+            grades[src["link"]] = cached[0]
+        else:
+            pending.append(src)
+    
+    if pending:
+        if GRADING_MODE == "parallel":
+            grades_list = await asyncio.gather(*(grade_url(llm, company, location, ctype, src["link"]) for src in pending))
+            graded = [(src["link"], result) for src, result in zip(pending, grades_list)]
+        else:
+            graded = await grade_batch(pending)
+        for url, result in graded:
+            grades[url] = result
+            # Errors are not memoized so the URL is graded again next time
+            if grade_cache and result != "NO | Error":
+                await grade_cache.aset(keys[url], result)
+    
+    results = [(src["link"], grades[src["link"]]) for src in sources_to_check]
+    failed = sum(1 for _, result in results if result == "NO | Error")
+    if failed:
+        logs.append(json.dumps({"type": "log", "message": f"⚠️ Filter Agent: {failed} grades failed after retries (counted as rejections, not memoized)."}))
     
     filtered_urls = []
     for url, result in results:
-        if "|" in result:
-            grade, reason = result.split("|", 1)
-            grade = grade.strip().upper()
-            reason = reason.strip()
-        else:
-            grade = result.strip().upper()
-            reason = "No reason provided"
-            
-        if "YES" in grade:
+        approved, reason = parse_grade(result)
+        if approved:
             filtered_urls.append(url)
             logs.append(json.dumps({"type": "log", "message": f"✅ Filter: Approved {url} ({reason})"}))
         else:
@@ -165,11 +371,304 @@ async def filter_node(state: AgentState):
     logs.append(json.dumps({"type": "log", "message": f"✅ Filter Agent: Final selection: {len(filtered_urls)} sources."}))
     return {"filtered_urls": filtered_urls, "logs": logs}
 
-from backend.shared_resources import event_queue
+from backend.shared_resources import channel_from_config
+from backend.content_cache import get_content_cache, canonical_url
+from backend.fetcher import get_fetcher
+from backend.blocking import RequestBlocker
+from backend.storage_state import load_state, refresh_state
 import base64
 
-async def browse_node(state: AgentState):
+# Roughly what a field agent collects over a couple of page reads
+FAST_PATH_MAX_CHARS = 10000
+# Field agents run headed so the user can watch them; benchmarks and servers without a display set this
+FIELD_AGENT_HEADLESS = os.getenv("FIELD_AGENT_HEADLESS", "0") == "1"
+
+async def scout_subpages(official_url: str) -> List[str]:
+    """The Scout: finds About/Team/Services-style sub-pages on the official site."""
+    storage_state = await load_state(official_url)
+    async with browser_pool.context(storage_state=storage_state) as context: # Scout is invisible/fast
+        page = await RequestBlocker(context).new_page()
+        with span("navigation", "goto"):
+            await page.goto(official_url, timeout=15000, wait_until="domcontentloaded")
+        
+        # Extract links
+        links = await page.evaluate("""
+            () => {
+                const anchors = Array.from(document.querySelectorAll('a'));
+                const keywords = ['about', 'team', 'mission', 'services', 'product', 'contact', 'careers', 'investors'];
+                return anchors
+                    .filter(a => keywords.some(k => a.innerText.toLowerCase().includes(k)) || keywords.some(k => a.href.toLowerCase().includes(k)))
+                    .map(a => a.href)
+                    .filter(href => href.startsWith('http') && !href.includes('linkedin') && !href.includes('twitter') && !href.includes('facebook'));
+            }
+        """)
+        
+        if storage_state:
+            await refresh_state(context, official_url, page.url)
+        
+        # Dedup and limit
+        return list(set(links))[:4] # Grab top 4 sub-pages
+
+# "fast" runs the deterministic field agent and escalates to ReAct only when its heuristics fail;
+# "react" always lets the LLM drive the browser
+FIELD_AGENT_MODE = os.getenv("FIELD_AGENT_MODE", "fast")
+# Below this much text a page is "thin": follow one About/Team link, then escalate
+THIN_PAGE_CHARS = int(os.getenv("FIELD_AGENT_THIN_CHARS", "800"))
+SUBPAGE_KEYWORDS = ["about", "team", "leadership", "company"]
+
+async def fast_extract(actions) -> tuple[str, str | None]:
+    """
+    The deterministic field agent: the sequence the ReAct prompt dictates, without an LLM.
+    Dismiss popups → scroll until settled → read → if thin, follow one About/Team link and read it too.
+    Returns (text, escalation reason or None).
+    """
+    from backend.fetcher import CHALLENGE_MARKERS
+    page = actions.page
+    
+    await actions.close_popup()
+    await actions.scroll_until_settled()
+    text = await actions.read_page()
+    if text.startswith("Error reading page"):
+        return "", "read failed"
+    
+    if len(text) < THIN_PAGE_CHARS:
+        links = await actions.find_links(SUBPAGE_KEYWORDS, same_site=True, limit=1)
+        if links:
+            await actions.log(f"Page is thin, following {links[0]}")
+            try:
+                with span("navigation", "goto"):
+                    await page.goto(links[0], timeout=30000, wait_until="domcontentloaded")
+                await actions.stream_frame("Loaded", force=True)
+                await actions.close_popup()
+                await actions.scroll_until_settled()
+                more = await actions.read_page()
+                if not more.startswith("Error reading page"):
+                    text = f"{text}\n{more}".strip()
+            except Exception as e:
+                await actions.log(f"Could not follow {links[0]}: {str(e)[:50]}")
+    
+    if CHALLENGE_MARKERS.search(text[:2000]) and len(text) < 4 * THIN_PAGE_CHARS:
+        return text, "bot challenge"
+    if len(text) < THIN_PAGE_CHARS:
+        return text, "thin page"
+    return text, None
+
+async def react_extract(actions, url: str) -> str:
+    """The LLM-driven field agent: a ReAct loop over the BrowserActions tools."""
+    from langchain_core.tools import tool
+    from langgraph.prebuilt import create_react_agent
+    
+    # --- Define Tools for this specific Agent ---
+    reads = []
+    
+    @tool
+    async def read_page_tool():
+        """Reads the text of the current page that earlier reads have not returned. Use this to gather information."""
+        text = await actions.read_page()
+        if text and not text.startswith("Error reading page"):
+            reads.append(text)
+            return text
+        if actions.last_read and actions.last_read["exhausted"]:
+            return "Reading budget for this page is used up. Finish now."
+        return text or "No new text since the last read. Scroll, navigate or finish."
+
+    @tool
+    async def scroll_down_tool():
+        """Scrolls down the page to reveal more content. Use this if you need to see more."""
+        return await actions.scroll_down()
+
+    @tool
+    async def click_element_tool(selector: str):
+        """Clicks on an element matching the CSS selector. Use this to navigate or close modals."""
+        return await actions.click_element(selector)
+
+    @tool
+    async def close_popup_tool():
+        """Checks for and closes any visible popups or modals. Use this immediately if a popup blocks your view."""
+        return await actions.close_popup()
+        
+    @tool
+    async def get_links_tool(category: str):
+        """Finds links matching a category (e.g., 'about', 'team', 'contact'). Returns URLs."""
+        return await actions.get_links(category)
+
+    tools = [read_page_tool, scroll_down_tool, click_element_tool, close_popup_tool, get_links_tool]
+    
+    # Initialize ReAct Agent
+    llm = gemini(temperature=0)
+    agent = create_react_agent(llm, tools)
+    
+    # Run the Agent
+    prompt = f"""
+    You are an autonomous web researcher. Your goal is to extract relevant information about the company from this page: {url}
+    
+    1. **CHECK FOR POPUPS REPEATEDLY**: Call `close_popup_tool` at the start. If you still see a login wall or overlay, call it again.
+    2. **VERIFY ACCESS**: If the page content is hidden behind a modal, you MUST close it before reading.
+    3. **EXPLORE**: Scroll down to see the content.
+    4. **READ**: Read the page content.
+    5. **NAVIGATE**: If the page is empty or irrelevant, look for "About" or "Team" links using `get_links_tool`.
+    6. **FINISH**: Once you have enough info, stop.
+    
+    Limit your actions to 10 steps max.
+    """
+    
+    messages = [("human", prompt)]
+    
+    async for chunk in agent.astream({"messages": messages}):
+        if "agent" in chunk:
+            # Log agent thought/action
+            msg = chunk["agent"]["messages"][0]
+            # await actions.log(f"Thinking: {msg.content[:50]}...")
+        elif "tools" in chunk:
+            # Log tool output
+            msg = chunk["tools"]["messages"][0]
+            # await actions.log(f"Tool Output: {msg.content[:50]}...")
+    
+    # Reads are incremental, so every collected read is new text
+    final_content = "\n".join(reads)
+    if not final_content:
+        # Fallback if agent didn't explicitly read
+        final_content = await actions.read_page()
+    return final_content
+
+async def fetch_url(url: str, agent_id: str, channel) -> str:
+    """A Field Agent: extracts one page (cache → HTTP fast path → browser, deterministic then ReAct)."""
+    from backend.tools import BrowserActions
+    
+    content_cache = get_content_cache()
+    fetcher = get_fetcher()
+    
+    # Cache hit: reuse the text extracted on a previous visit, no browser needed
+    if content_cache:
+        cached = await content_cache.get(url)
+        if cached:
+            await channel.put(json.dumps({"type": "log", "message": f"♻️ {agent_id} using cached content for: {url}"}))
+            return f"Source: {url}\nContent: {cached}\n"
+    
+    # Fast path: server-rendered pages need no browser (or LLM) at all
+    if fetcher:
+        with span("fetch", "http"):
+            fetched = await fetcher.fetch(url)
+        if fetched:
+            content = fetched.text[:FAST_PATH_MAX_CHARS]
+            await channel.put(json.dumps({"type": "log", "message": f"⚡ {agent_id} fetched {url} over HTTP"}))
+            if content_cache:
+                await content_cache.put(url, content, fetched.headers)
+            return f"Source: {url}\nContent: {content}\n"
+    
+    # Cookies/localStorage saved after an earlier popup dismissal on this domain (consent already given)
+    storage_state = await load_state(url)
+    if storage_state:
+        await channel.put(json.dumps({"type": "log", "message": f"🍪 {agent_id} reusing saved site state for: {url}"}))
+    
+    try:
+        # HEADLESS=FALSE allows the user to "literally see" the agent working
+        async with browser_pool.context(
+            headless=FIELD_AGENT_HEADLESS,
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            viewport={"width": 1280, "height": 720},
+            device_scale_factor=1,
+            storage_state=storage_state,
+        ) as context:
+            
+            # STEALTH & VISUALS: Inject scripts
+            await context.add_init_script("""
+                // 1. Stealth
+                Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
+                window.chrome = { runtime: {} };
+                Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
+                Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
+
+                // 2. Visual AI Cursor
+                window.installCursor = () => {
+                    if (document.getElementById('ai-cursor')) return;
+                    const cursor = document.createElement('div');
+                    cursor.id = 'ai-cursor';
+                    cursor.style.position = 'fixed';
+                    cursor.style.width = '20px';
+                    cursor.style.height = '20px';
+                    cursor.style.borderRadius = '50%';
+                    cursor.style.backgroundColor = 'rgba(255, 0, 0, 0.7)';
+                    cursor.style.border = '2px solid white';
+                    cursor.style.boxShadow = '0 0 10px rgba(255, 0, 0, 0.5)';
+                    cursor.style.zIndex = '999999';
+                    cursor.style.pointerEvents = 'none';
+                    cursor.style.transition = 'all 0.1s ease-out'; // Smoother transition
+                    cursor.style.transform = 'translate(-50%, -50%)';
+                    document.body.appendChild(cursor);
+                };
+
+                window.moveCursor = (x, y) => {
+                    const cursor = document.getElementById('ai-cursor');
+                    if (cursor) {
+                        cursor.style.left = x + 'px';
+                        cursor.style.top = y + 'px';
+                    }
+                };
+            """)
+            
+            # Resource Blocking: media and ad/tracker requests are refused inside Chromium
+            blocker = RequestBlocker(context)
+            page = await blocker.new_page()
+            
+            # Initialize Browser Actions
+            actions = BrowserActions(page, channel, agent_id, requested_url=url)
+            
+            await channel.put(json.dumps({"type": "log", "message": f"🌐 {agent_id} connecting to: {url}"}))
+            
+            with span("navigation", "goto"):
+                response = await page.goto(url, timeout=45000, wait_until="domcontentloaded")
+            # Later navigations (an About/Team hop, ReAct clicks) mean the text is not all from `url`
+            landed = canonical_url(page.url)
+            left_page = []
+            page.on("framenavigated", lambda frame: frame == page.main_frame and canonical_url(frame.url) != landed and left_page.append(frame.url))
+            await page.evaluate("window.installCursor()")
+            await actions.stream_frame("Loaded", force=True)
+            
+            final_content, escalation = "", "ReAct mode"
+            if FIELD_AGENT_MODE == "fast":
+                final_content, escalation = await fast_extract(actions)
+                if escalation:
+                    await actions.log(f"Escalating to ReAct agent ({escalation})...")
+                else:
+                    await actions.log("Extracted without LLM calls.")
+            
+            if escalation:
+                react_content = await react_extract(actions, url)
+                final_content = "\n".join(part for part in (final_content, react_content) if part)
+                
+            frames = actions.frame_stats()
+            await channel.put(json.dumps({"type": "log", "message": f"📉 {agent_id} previews: {frames['frames_sent']} sent, {frames['frames_dropped']} dropped (~{frames['bytes_saved'] // 1024} KB saved)"}))
+            blocked = blocker.stats(page)
+            if blocked:
+                await channel.put(json.dumps({"type": "log", "message": f"🛡️ {agent_id} blocked {blocked['blocked']} requests ({blocked['blocked_by_url']} by URL/domain, {blocked['blocked_by_type']} by type); loaded {blocked['requests']} (~{blocked['bytes'] // 1024} KB)"}))
+            settle = actions.settle_summary()
+            if settle:
+                await channel.put(json.dumps({"type": "log", "message": f"⏱️ {agent_id} settle waits: {settle}"}))
+                
+            # Cache only text that is complete and belongs to `url`: no bot challenge,
+            # no failed read, nothing read on another page
+            cacheable = (
+                final_content
+                and escalation not in ("bot challenge", "read failed")
+                and not final_content.startswith("Error reading page")
+                and not left_page
+            )
+            if content_cache and cacheable:
+                await content_cache.put(url, final_content, response.headers if response else None)
+            # close_popup already saved the state if it dismissed anything
+            if storage_state and not actions.last_dismissed:
+                await refresh_state(context, url, page.url)
+                
+            return f"Source: {url}\nContent: {final_content}\n"
+
+    except Exception as e:
+        await channel.put(json.dumps({"type": "log", "message": f"❌ {agent_id} error: {str(e)[:50]}"}))
+        return f"Source: {url}\nError: {e}\n"
+
+async def browse_node(state: AgentState, config: RunnableConfig):
     """The Researchers: Parallel browsing."""
+    channel = channel_from_config(config)
     logs = []
     urls = state["filtered_urls"]
     logs.append(json.dumps({"type": "log", "message": f"🕵️‍♂️ Field Agents: Dispatching {len(urls)} agents to browse sites..."}))
@@ -184,190 +683,24 @@ async def browse_node(state: AgentState):
         logs.append(json.dumps({"type": "log", "message": f"🕵️‍♂️ Scout Agent: Analyzing {official_url} for sub-sections (About, Team, Services)..."}))
         
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=True) # Scout is invisible/fast
-                page = await browser.new_page()
-                try:
-                    await page.goto(official_url, timeout=15000, wait_until="domcontentloaded")
-                    
-                    # Extract links
-                    links = await page.evaluate("""
-                        () => {
-                            const anchors = Array.from(document.querySelectorAll('a'));
-                            const keywords = ['about', 'team', 'mission', 'services', 'product', 'contact', 'careers', 'investors'];
-                            return anchors
-                                .filter(a => keywords.some(k => a.innerText.toLowerCase().includes(k)) || keywords.some(k => a.href.toLowerCase().includes(k)))
-                                .map(a => a.href)
-                                .filter(href => href.startsWith('http') && !href.includes('linkedin') && !href.includes('twitter') && !href.includes('facebook'));
-                        }
-                    """)
-                    
-                    # Dedup and limit
-                    unique_links = list(set(links))[:4] # Grab top 4 sub-pages
-                    if unique_links:
-                        logs.append(json.dumps({"type": "log", "message": f"✅ Scout Agent: Found {len(unique_links)} sub-pages to explore."}))
-                        # Insert them after the official url
-                        for link in unique_links:
-                            if link not in urls:
-                                urls.insert(1, link)
-                except Exception as e:
-                    logs.append(json.dumps({"type": "log", "message": f"⚠️ Scout Agent failed: {str(e)[:50]}"}))
-                finally:
-                    await browser.close()
-        except: pass
-
-    # --- ReAct Agent Integration ---
-    from backend.tools import BrowserActions
-    from langchain_core.tools import tool
-    from langgraph.prebuilt import create_react_agent
+            unique_links = await scout_subpages(official_url)
+            if unique_links:
+                logs.append(json.dumps({"type": "log", "message": f"✅ Scout Agent: Found {len(unique_links)} sub-pages to explore."}))
+                # Insert them after the official url
+                for link in unique_links:
+                    if link not in urls:
+                        urls.insert(1, link)
+        except Exception as e:
+            logs.append(json.dumps({"type": "log", "message": f"⚠️ Scout Agent failed: {str(e)[:50]}"}))
 
     extracted_content = []
     
-    async def fetch_url(url, agent_id):
-        try:
-            async with async_playwright() as p:
-                # HEADLESS=FALSE allows the user to "literally see" the agent working
-                browser = await p.chromium.launch(headless=False, slow_mo=50, args=["--disable-blink-features=AutomationControlled"]) 
-                
-                context = await browser.new_context(
-                    user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                    viewport={"width": 1280, "height": 720},
-                    device_scale_factor=1,
-                )
-                
-                # STEALTH & VISUALS: Inject scripts
-                await context.add_init_script("""
-                    // 1. Stealth
-                    Object.defineProperty(navigator, 'webdriver', { get: () => undefined });
-                    window.chrome = { runtime: {} };
-                    Object.defineProperty(navigator, 'plugins', { get: () => [1, 2, 3, 4, 5] });
-                    Object.defineProperty(navigator, 'languages', { get: () => ['en-US', 'en'] });
-
-                    // 2. Visual AI Cursor
-                    window.installCursor = () => {
-                        if (document.getElementById('ai-cursor')) return;
-                        const cursor = document.createElement('div');
-                        cursor.id = 'ai-cursor';
-                        cursor.style.position = 'fixed';
-                        cursor.style.width = '20px';
-                        cursor.style.height = '20px';
-                        cursor.style.borderRadius = '50%';
-                        cursor.style.backgroundColor = 'rgba(255, 0, 0, 0.7)';
-                        cursor.style.border = '2px solid white';
-                        cursor.style.boxShadow = '0 0 10px rgba(255, 0, 0, 0.5)';
-                        cursor.style.zIndex = '999999';
-                        cursor.style.pointerEvents = 'none';
-                        cursor.style.transition = 'all 0.1s ease-out'; // Smoother transition
-                        cursor.style.transform = 'translate(-50%, -50%)';
-                        document.body.appendChild(cursor);
-                    };
-
-                    window.moveCursor = (x, y) => {
-                        const cursor = document.getElementById('ai-cursor');
-                        if (cursor) {
-                            cursor.style.left = x + 'px';
-                            cursor.style.top = y + 'px';
-                        }
-                    };
-                """)
-                
-                page = await context.new_page()
-                
-                # Resource Blocking
-                await page.route("**/*", lambda route: 
-                    route.abort() if route.request.resource_type in ["image", "media", "font"] 
-                    else route.continue_()
-                )
-                
-                # Initialize Browser Actions
-                actions = BrowserActions(page, event_queue, agent_id)
-                
-                try:
-                    await event_queue.put(json.dumps({"type": "log", "message": f"🌐 {agent_id} connecting to: {url}"}))
-                    
-                    await page.goto(url, timeout=45000, wait_until="domcontentloaded")
-                    await page.evaluate("window.installCursor()")
-                    await actions.stream_frame("Loaded")
-                    
-                    # --- Define Tools for this specific Agent ---
-                    @tool
-                    async def read_page_tool():
-                        """Reads the visible text content of the current page. Use this to gather information."""
-                        return await actions.read_page()
-
-                    @tool
-                    async def scroll_down_tool():
-                        """Scrolls down the page to reveal more content. Use this if you need to see more."""
-                        return await actions.scroll_down()
-
-                    @tool
-                    async def click_element_tool(selector: str):
-                        """Clicks on an element matching the CSS selector. Use this to navigate or close modals."""
-                        return await actions.click_element(selector)
-
-                    @tool
-                    async def close_popup_tool():
-                        """Checks for and closes any visible popups or modals. Use this immediately if a popup blocks your view."""
-                        return await actions.close_popup()
-                        
-                    @tool
-                    async def get_links_tool(category: str):
-                        """Finds links matching a category (e.g., 'about', 'team', 'contact'). Returns URLs."""
-                        return await actions.get_links(category)
-
-                    tools = [read_page_tool, scroll_down_tool, click_element_tool, close_popup_tool, get_links_tool]
-                    
-                    # Initialize ReAct Agent
-                    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=0)
-                    agent = create_react_agent(llm, tools)
-                    
-                    # Run the Agent
-                    prompt = f"""
-                    You are an autonomous web researcher. Your goal is to extract relevant information about the company from this page: {url}
-                    
-                    1. **CHECK FOR POPUPS REPEATEDLY**: Call `close_popup_tool` at the start. If you still see a login wall or overlay, call it again.
-                    2. **VERIFY ACCESS**: If the page content is hidden behind a modal, you MUST close it before reading.
-                    3. **EXPLORE**: Scroll down to see the content.
-                    4. **READ**: Read the page content.
-                    5. **NAVIGATE**: If the page is empty or irrelevant, look for "About" or "Team" links using `get_links_tool`.
-                    6. **FINISH**: Once you have enough info, stop.
-                    
-                    Limit your actions to 10 steps max.
-                    """
-                    
-                    messages = [("human", prompt)]
-                    final_content = ""
-                    
-                    async for chunk in agent.astream({"messages": messages}):
-                        if "agent" in chunk:
-                            # Log agent thought/action
-                            msg = chunk["agent"]["messages"][0]
-                            # await actions.log(f"Thinking: {msg.content[:50]}...")
-                        elif "tools" in chunk:
-                            # Log tool output
-                            msg = chunk["tools"]["messages"][0]
-                            # await actions.log(f"Tool Output: {msg.content[:50]}...")
-                            if msg.name == "read_page_tool":
-                                final_content += msg.content + "\n"
-                                
-                    if not final_content:
-                        # Fallback if agent didn't explicitly read
-                        final_content = await actions.read_page()
-                        
-                    return f"Source: {url}\nContent: {final_content}\n"
-
-                finally:
-                    await browser.close()
-        except Exception as e:
-            await event_queue.put(json.dumps({"type": "log", "message": f"❌ {agent_id} error: {str(e)[:50]}"}))
-            return f"Source: {url}\nError: {e}\n"
-
     # Run in parallel with IDs
     tasks = []
     # Limit total agents to avoid crashing system
     final_urls = urls[:12] # Cap at 12 agents max
     for i, url in enumerate(final_urls):
-        tasks.append(fetch_url(url, f"Agent-{i+1}"))
+        tasks.append(fetch_url(url, f"Agent-{i+1}", channel))
     
     results = await asyncio.gather(*tasks)
     extracted_content.extend(results)
@@ -375,20 +708,228 @@ async def browse_node(state: AgentState):
     logs.append(json.dumps({"type": "log", "message": "📂 Field Agents: Mission complete."}))
     return {"content": extracted_content, "logs": logs}
 
-async def synthesize_node(state: AgentState):
+# "barrier" runs gather → filter → browse as separate nodes; "streaming" runs them as one pipelined node
+PIPELINE_MODE = os.getenv("PIPELINE_MODE", "barrier")
+MAX_GRADED = 15
+MAX_APPROVED = 8
+MAX_SCOUTED = 4
+MAX_BROWSED = 12
+
+async def pipeline_node(state: AgentState, config: RunnableConfig):
+    """
+    Streaming Gather → Filter → Browse.
+    Search results are graded as soon as they arrive and every approved URL goes straight
+    to a field agent, so the run follows the critical path of each URL instead of waiting
+    for the slowest search and the slowest grade. The barrier-mode caps still apply.
+    """
+    channel = channel_from_config(config)
+    company = state["company_name"]
+    location = state["state"]
+    ctype = state["company_type"]
+    
+    search = get_search()
+    llm = grader_llm()
+    grade_cache = get_grade_cache()
+    prefilter = SourcePrefilter(company)
+    
+    sources = {}        # Every raw source seen, in arrival order
+    grading = set()     # URLs sent to the grader (each at most once)
+    approved = []
+    browsing = []       # URLs handed to field agents, in dispatch order
+    content = []
+    official = {"url": None, "scouted": False}
+    graded = 0
+    tasks = set()
+    
+    async def log(message: str):
+        await channel.put(json.dumps({"type": "log", "message": message}))
+    
+    def spawn(coro):
+        task = asyncio.create_task(coro)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    
+    async def drain():
+        # Tasks spawn further tasks (search → grade → browse/scout); wait until the pipeline drains.
+        # If one fails (or the node is cancelled), cancel and collect the rest so none outlive the node.
+        try:
+            while tasks:
+                await asyncio.gather(*list(tasks))
+        except BaseException:
+            while tasks:
+                pending = list(tasks)
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+            raise
+    
+    async def browse(url: str):
+        agent_id = f"Agent-{browsing.index(url) + 1}"
+        content.append(await fetch_url(url, agent_id, channel))
+    
+    def dispatch(url: str):
+        if url in browsing or len(browsing) >= MAX_BROWSED:
+            return
+        browsing.append(url)
+        spawn(browse(url))
+    
+    async def scout(url: str):
+        await log(f"🕵️‍♂️ Scout Agent: Analyzing {url} for sub-sections (About, Team, Services)...")
+        try:
+            links = await scout_subpages(url)
+        except Exception as e:
+            await log(f"⚠️ Scout Agent failed: {str(e)[:50]}")
+            return
+        if links:
+            await log(f"✅ Scout Agent: Found {len(links)} sub-pages to explore.")
+        for link in links[:MAX_SCOUTED]:
+            dispatch(link)
+    
+    async def grade(src: dict):
+        url = src["link"]
+        key = grade_cache_key(company, location, ctype, src, "url")
+        cached = await grade_cache.aget(key) if grade_cache else None
+        if cached:
+            result = cached[0]
+        else:
+            result = await grade_url(llm, company, location, ctype, url)
+            if grade_cache and result != "NO | Error":
+                await grade_cache.aset(key, result)
+        
+        ok, reason = parse_grade(result)
+        if not ok or len(approved) >= MAX_APPROVED:
+            return
+        approved.append(url)
+        await log(f"✅ Filter: Approved {url} ({reason})")
+        dispatch(url)
+        if url == official["url"] and not official["scouted"]:
+            official["scouted"] = True
+            spawn(scout(url))
+    
+    def add_source(src: dict, priority: bool = False):
+        nonlocal graded
+        url = src["link"]
+        if not url or url in grading or (url in sources and not priority):
+            return
+        sources.setdefault(url, src)
+        # The official site is always graded (once): it skips the prefilter and the budget,
+        # even when a broad result brought it in first and it was turned away then
+        if priority or (graded < MAX_GRADED and prefilter.check(src) is None):
+            grading.add(url)
+            graded += 1
+            spawn(grade(src))
+    
+    async def run_search(query: str, num_results: int):
+        try:
+            results = await search.results(query, num_results)
+        except Exception:
+            return
+        for r in results:
+            add_source(source_of(r))
+    
+    async def discover():
+        try:
+            results = await search.results(discovery_query(company, location), 3)
+        except Exception as e:
+            await log(f"⚠️ Gatherer Agent: Discovery error: {e}")
+            return
+        official["url"] = pick_official_site(results)
+        if official["url"]:
+            await log(f"🎯 Gatherer Agent: Found official site candidate: {official['url']}")
+            if official["url"] in approved:
+                official["scouted"] = True
+                spawn(scout(official["url"]))
+            add_source(source_of(next(r for r in results if r.get("link") == official["url"])), priority=True)
+            for query in site_queries(official["url"]):
+                spawn(run_search(query, 5))
+    
+    await log(f"🕵️‍♀️ Gatherer Agent: Scouting for {company} in {location} (streaming pipeline)...")
+    spawn(discover())
+    for query in broad_queries(company, location, ctype):
+        spawn(run_search(query, 5))
+    
+    await drain()
+    
+    # Same guarantees as barrier mode: scout the first approved URL if the official site
+    # wasn't approved, and fall back to the top raw results if nothing was approved
+    if approved and not official["scouted"]:
+        official["scouted"] = True
+        spawn(scout(approved[0]))
+    if not approved:
+        await log("⚠️ Filter Agent: Strict filter rejected all. Using top raw results fallback.")
+        for url in list(sources)[:3]:
+            dispatch(url)
+    await drain()
+    
+    await log("📂 Field Agents: Mission complete.")
+    return {
+        "raw_urls": list(sources),
+        "raw_sources": list(sources.values()),
+        "filtered_urls": approved or list(sources)[:3],
+        "content": content,
+    }
+
+# "map_reduce" condenses each source in parallel before the final report; "single" sends raw content in one prompt
+SYNTHESIS_MODE = os.getenv("SYNTHESIS_MODE", "map_reduce")
+SYNTHESIS_MAP_CONCURRENCY = int(os.getenv("SYNTHESIS_MAP_CONCURRENCY", "6"))
+
+async def condense_sources(company: str, sources: List[str]) -> List[str]:
+    """Map step: turns each raw source into short risk-relevant notes (bounded concurrency)."""
+    llm = gemini(temperature=0)
+    semaphore = asyncio.Semaphore(SYNTHESIS_MAP_CONCURRENCY)
+    
+    async def condense(source: str):
+        header, _, body = source.partition("\n")
+        if not body.startswith("Content:"):
+            return None  # Failed fetch ("Error: ..."), nothing to condense
+        
+        prompt = f"""
+        You are a research assistant for a Risk Assessment Expert investigating "{company}".
+        Condense the source below into concise notes (max ~300 words) covering only risk-relevant facts:
+        identity/registration, leadership, financials, legal or regulatory actions, reputation and reviews,
+        operations, and anything else that affects counterparty risk. Keep names, dates, figures and claims verbatim.
+        Omit navigation text and boilerplate. If the source says nothing about this company, reply exactly "IRRELEVANT".
+        
+        {source}
+        """
+        try:
+            async with semaphore:
+                response = await llm.ainvoke(prompt)
+            notes = response.content.strip()
+        except Exception:
+            # Never lose a source to a failed map call: keep the head of the raw text instead
+            notes = body[:4000]
+        
+        if notes == "IRRELEVANT":
+            return None
+        return f"{header}\nNotes: {notes}"
+    
+    notes = await asyncio.gather(*(condense(source) for source in sources))
+    return [n for n in notes if n]
+
+async def synthesize_node(state: AgentState, config: RunnableConfig):
     """The Analyst: Compiles the report."""
+    channel = channel_from_config(config)
+    # A resumed run re-runs this node from scratch: clients drop any draft from an interrupted attempt
+    await channel.put(json.dumps({"type": "summary_reset"}), critical=True)
     logs = []
     logs.append(json.dumps({"type": "log", "message": "🧠 Analyst Agent: Synthesizing final report..."}))
     
-    llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash", google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=0.2)
+    llm = gemini(temperature=0.2)
     
-    # Token Safety: Truncate context if it's too large to prevent token explosion
-    full_context = "\n\n".join(state["content"])
-    if len(full_context) > 100000:
-        logs.append(json.dumps({"type": "log", "message": "⚠️ Analyst Agent: Context too large, truncating to 100k chars..."}))
-        context = full_context[:100000] + "\n...(truncated)..."
+    if SYNTHESIS_MODE == "map_reduce":
+        # Map: every source is condensed independently, so none is dropped by position
+        notes = await condense_sources(state["company_name"], state["content"])
+        logs.append(json.dumps({"type": "log", "message": f"🗂️ Analyst Agent: Condensed {len(state['content'])} sources into {len(notes)} sets of notes."}))
+        context = "\n\n".join(notes)
     else:
-        context = full_context
+        # Token Safety: Truncate context if it's too large to prevent token explosion
+        full_context = "\n\n".join(state["content"])
+        if len(full_context) > 100000:
+            logs.append(json.dumps({"type": "log", "message": "⚠️ Analyst Agent: Context too large, truncating to 100k chars..."}))
+            context = full_context[:100000] + "\n...(truncated)..."
+        else:
+            context = full_context
     
     prompt = f"""
     You are a Risk Assessment Expert. Analyze the following gathered intelligence for "{state['company_name']}".
@@ -455,8 +996,39 @@ async def synthesize_node(state: AgentState):
     IMPORTANT: Ensure the JSON is valid and strictly follows the schema. Do not wrap the JSON in markdown code blocks within the JSON section.
     """
     
-    response = await llm.ainvoke(prompt)
-    text = response.content
+    # Stream the answer: markdown goes out as it is generated, and after the separator
+    # each report section is pushed as soon as its JSON closes.
+    separator = "---JSON_START---"
+    sections = JsonSectionStream()
+    text = ""
+    streamed = 0  # Characters of markdown already sent
+    json_started = False
+    
+    async for chunk in llm.astream(prompt):
+        piece = chunk.content if isinstance(chunk.content, str) else ""
+        text += piece
+        
+        if not json_started:
+            idx = text.find(separator)
+            if idx >= 0:
+                json_started = True
+                markdown_end = idx
+                completed = sections.feed(text[idx + len(separator):])
+            else:
+                # Hold back a possible partial separator at the end of the buffer
+                markdown_end = len(text) - (len(separator) - 1)
+                completed = []
+            if markdown_end > streamed:
+                await channel.put(json.dumps({"type": "summary", "content": text[streamed:markdown_end]}), critical=True)
+                streamed = markdown_end
+        else:
+            completed = sections.feed(piece)
+        
+        for path, value in completed:
+            await channel.put(json.dumps({"type": "section", "path": path, "data": value}), critical=True)
+    
+    if not json_started and len(text) > streamed:
+        await channel.put(json.dumps({"type": "summary", "content": text[streamed:]}), critical=True)
     
     # Robust Parsing Logic
     import re
@@ -506,13 +1078,24 @@ async def synthesize_node(state: AgentState):
 
 # --- Graph Construction ---
 
-def create_graph():
+def create_graph(checkpointer=None):
     workflow = StateGraph(AgentState)
     
-    workflow.add_node("gather", research_node)
-    workflow.add_node("filter", filter_node)
-    workflow.add_node("browse", browse_node)
-    workflow.add_node("synthesize", synthesize_node)
+    if PIPELINE_MODE == "streaming":
+        workflow.add_node("pipeline", traced("node", "pipeline")(pipeline_node))
+        workflow.add_node("synthesize", traced("node", "synthesize")(synthesize_node))
+        
+        workflow.set_entry_point("pipeline")
+        
+        workflow.add_edge("pipeline", "synthesize")
+        workflow.add_edge("synthesize", END)
+        return workflow.compile(checkpointer=checkpointer)
+    
+    # Every node is timed into /metrics and the assessment's timing summary
+    workflow.add_node("gather", traced("node", "gather")(research_node))
+    workflow.add_node("filter", traced("node", "filter")(filter_node))
+    workflow.add_node("browse", traced("node", "browse")(browse_node))
+    workflow.add_node("synthesize", traced("node", "synthesize")(synthesize_node))
     
     workflow.set_entry_point("gather")
     
@@ -521,4 +1104,4 @@ def create_graph():
     workflow.add_edge("browse", "synthesize")
     workflow.add_edge("synthesize", END)
     
-    return workflow.compile()
+    return workflow.compile(checkpointer=checkpointer)
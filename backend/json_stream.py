@@ -0,0 +1,107 @@
+import json
+
+
+class JsonSectionStream:
+    """
+    Incremental parser that reports report sections as soon as their JSON closes.
+
+    Feed it text chunks of a single JSON object as they arrive from the LLM; `feed`
+    returns every (path, value) pair completed so far. Members of the root object are
+    reported directly, except keys listed in `expand`, whose own members are reported
+    instead (e.g. each section of "riskReport" rather than the whole report at the end).
+    Text before the opening brace (markdown fences, whitespace) is skipped.
+    """
+
+    def __init__(self, expand=("riskReport",)):
+        self.expand = set(expand)
+        self.text = ""
+        self.pos = 0
+        self.done = False
+        self._stack = []          # Open containers: {"type", "path", "key", "expect_key", "value_start"}
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+
+    def _report_path(self, frame: dict):
+        """Path of the member currently being parsed in `frame`, or None if it isn't reported."""
+        if frame["type"] != "{" or frame["key"] is None:
+            return None
+        path = frame["path"] + [frame["key"]]
+        if len(path) == 1 and path[0] not in self.expand:
+            return path
+        if len(path) == 2 and path[0] in self.expand:
+            return path
+        return None
+
+    def _emit(self, frame: dict, end: int, completed: list):
+        path = self._report_path(frame)
+        start = frame["value_start"]
+        frame["value_start"] = None
+        if path is None or start is None:
+            return
+        try:
+            completed.append((path, json.loads(self.text[start:end])))
+        except json.JSONDecodeError:
+            pass  # Malformed section; the final full parse decides what to do
+
+    def feed(self, chunk: str) -> list:
+        self.text += chunk
+        completed = []
+
+        while self.pos < len(self.text) and not self.done:
+            i = self.pos
+            c = self.text[i]
+            self.pos += 1
+            frame = self._stack[-1] if self._stack else None
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    if frame and frame["type"] == "{" and frame["expect_key"]:
+                        try:
+                            frame["key"] = json.loads(self.text[self._string_start:i + 1])
+                        except json.JSONDecodeError:
+                            frame["key"] = None
+                continue
+
+            if frame is None:
+                # Before the root object: skip fences/whitespace until "{"
+                if c == "{":
+                    self._stack.append({"type": "{", "path": [], "key": None, "expect_key": True, "value_start": None})
+                continue
+
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                if not (frame["type"] == "{" and frame["expect_key"]) and frame["value_start"] is None:
+                    frame["value_start"] = i
+            elif c in "{[":
+                if frame["value_start"] is None:
+                    frame["value_start"] = i
+                path = frame["path"] + [frame["key"]] if frame["type"] == "{" else frame["path"]
+                self._stack.append({"type": c, "path": path, "key": None, "expect_key": c == "{", "value_start": None})
+            elif c in "}]":
+                closed = self._stack.pop()
+                if closed["value_start"] is not None:
+                    self._emit(closed, i, completed)  # Trailing scalar member
+                if self._stack:
+                    self._emit(self._stack[-1], i + 1, completed)
+                else:
+                    self.done = True
+            elif c == ":":
+                frame["expect_key"] = False
+            elif c == ",":
+                if frame["value_start"] is not None:
+                    self._emit(frame, i, completed)
+                frame["value_start"] = None
+                if frame["type"] == "{":
+                    frame["expect_key"] = True
+                    frame["key"] = None
+            elif not c.isspace() and frame["value_start"] is None and not (frame["type"] == "{" and frame["expect_key"]):
+                frame["value_start"] = i  # Number / true / false / null
+
+        return completed
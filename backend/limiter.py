@@ -0,0 +1,166 @@
+import re
+import time
+import random
+import asyncio
+from contextlib import asynccontextmanager
+
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+STATUS_IN_MESSAGE = re.compile(r"\b(429|500|502|503|504)\b")
+
+
+def error_status(exc: BaseException) -> int | None:
+    """Best-effort HTTP status of an API error (google-genai, googleapiclient, aiohttp...)."""
+    resp = getattr(exc, "resp", None)
+    for value in (getattr(exc, "status_code", None), getattr(exc, "status", None), getattr(exc, "code", None), getattr(resp, "status", None)):
+        try:
+            status = int(value)
+        except (TypeError, ValueError):
+            continue
+        if 100 <= status < 600:
+            return status
+
+    # Wrapped errors often only keep the status in their message
+    text = str(exc)
+    match = STATUS_IN_MESSAGE.search(text)
+    if match:
+        return int(match.group(1))
+    lowered = text.lower()
+    if "resource_exhausted" in lowered or "quota" in lowered or "rate limit" in lowered:
+        return 429
+    return None
+
+
+def is_throttle(exc: BaseException) -> bool:
+    return error_status(exc) in THROTTLE_STATUSES
+
+
+def is_retryable(exc: BaseException) -> bool:
+    if isinstance(exc, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    return error_status(exc) in RETRYABLE_STATUSES
+
+
+class AdaptiveLimiter:
+    """
+    Client-side limiter for a quota-bound API, shared by every caller in the process.
+
+    - A token bucket caps the request rate at `rate` per second (bursts up to `burst`).
+    - AIMD concurrency: the in-flight limit grows by one per window of successful calls
+      and halves on a 429/503 (at most once per `decrease_cooldown`), between
+      `min_concurrency` and `max_concurrency`.
+    - `run` retries throttled/transient failures with full-jitter exponential backoff.
+
+    `stats()` exposes live in-flight/limit numbers plus throttle and retry counters.
+    """
+
+    def __init__(self, name: str, rate: float, burst: float = None, max_concurrency: int = 16, min_concurrency: int = 1,
+                 retries: int = 3, base_delay: float = 0.5, max_delay: float = 20, decrease_cooldown: float = 1.0):
+        self.name = name
+        self.rate = rate
+        self.burst = burst or max(1, rate)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.decrease_cooldown = decrease_cooldown
+
+        self.limit = float(max_concurrency)
+        self.in_flight = 0
+        self.waiting = 0
+        self._tokens = self.burst
+        self._refilled = time.monotonic()
+        self._last_decrease = 0.0
+        self._cond = asyncio.Condition()
+
+        self.successes = 0
+        self.errors = 0
+        self.throttles = 0
+        self.retried = 0
+        self.gave_up = 0
+        self.max_in_flight = 0
+
+    async def _take_token(self):
+        if self.rate <= 0:
+            return
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def _on_success(self):
+        self.successes += 1
+        # Additive increase: +1 after `limit` successes
+        self.limit = min(self.max_concurrency, self.limit + 1 / self.limit)
+
+    def _on_error(self, exc: BaseException):
+        self.errors += 1
+        if not is_throttle(exc):
+            return
+        self.throttles += 1
+        self._tokens = min(self._tokens, 0)  # Pause new requests until the bucket refills
+        now = time.monotonic()
+        # Multiplicative decrease, once per burst of throttles
+        if now - self._last_decrease >= self.decrease_cooldown:
+            self.limit = max(self.min_concurrency, self.limit / 2)
+            self._last_decrease = now
+
+    @asynccontextmanager
+    async def slot(self):
+        """Holds one request's worth of budget (a token and a concurrency slot); no retries."""
+        async with self._cond:
+            self.waiting += 1
+            try:
+                await self._cond.wait_for(lambda: self.in_flight < max(1, int(self.limit)))
+            finally:
+                self.waiting -= 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await self._take_token()
+            yield
+        except Exception as e:
+            self._on_error(e)
+            raise
+        else:
+            self._on_success()
+        finally:
+            async with self._cond:
+                self.in_flight -= 1
+                self._cond.notify_all()
+
+    async def run(self, call):
+        """Awaits `call()` under the limiter, retrying retryable failures with jittered backoff."""
+        attempt = 0
+        while True:
+            try:
+                async with self.slot():
+                    return await call()
+            except Exception as e:
+                if not is_retryable(e):
+                    raise
+                if attempt >= self.retries:
+                    self.gave_up += 1
+                    raise
+            attempt += 1
+            self.retried += 1
+            await asyncio.sleep(random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt)))
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "limit": round(self.limit, 2),
+            "max_in_flight": self.max_in_flight,
+            "rate": self.rate,
+            "successes": self.successes,
+            "errors": self.errors,
+            "throttles": self.throttles,
+            "retries": self.retried,
+            "gave_up": self.gave_up,
+        }
@@ -0,0 +1,29 @@
+import os
+from langchain_google_genai import ChatGoogleGenerativeAI
+from backend.scheduler import llm_limiter
+from backend.metrics import span, record_tokens
+
+
+class LimitedGemini(ChatGoogleGenerativeAI):
+    """Gemini chat model whose every request (including ReAct steps) goes through the shared llm_limiter."""
+    
+    async def _agenerate(self, *args, **kwargs):
+        generate = super()._agenerate
+        with span("llm", self.model):
+            result = await llm_limiter.run(lambda: generate(*args, **kwargs))
+        for generation in result.generations:
+            record_tokens(self.model, getattr(generation.message, "usage_metadata", None))
+        return result
+    
+    async def _astream(self, *args, **kwargs):
+        # Rate limited and counted, but not retried: chunks may already have been emitted
+        with span("llm", self.model):
+            async with llm_limiter.slot():
+                async for chunk in super()._astream(*args, **kwargs):
+                    record_tokens(self.model, getattr(chunk.message, "usage_metadata", None))
+                    yield chunk
+
+
+def gemini(temperature: float, model: str = "gemini-2.0-flash") -> LimitedGemini:
+    # The limiter owns retries, so 429s reach its AIMD control instead of being retried blindly inside the client
+    return LimitedGemini(model=model, google_api_key=os.getenv("GOOGLE_API_KEY"), temperature=temperature, max_retries=1)
@@ -15,7 +15,46 @@ print(f"DEBUG: Current Event Loop Policy: {asyncio.get_event_loop_policy()}")
 
 load_dotenv()
 
-app = FastAPI()
+from contextlib import asynccontextmanager
+from backend.shared_resources import browser_pool
+from backend.fetcher import get_fetcher
+from backend.content_cache import get_content_cache
+from backend.metrics import start_trace
+from fastapi.responses import PlainTextResponse
+from backend.assessments import CHECKPOINT_DB, get_store
+
+try:
+    from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+except ImportError:
+    # Without langgraph-checkpoint-sqlite, runs can still be resumed until the process exits
+    AsyncSqliteSaver = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    global graph
+    # Runs the previous process was executing can be resumed from their last checkpoint
+    get_store().mark_interrupted()
+    # Pre-warm the shared Chromium pool so the first assessment doesn't pay for browser launches
+    await browser_pool.start()
+    try:
+        if AsyncSqliteSaver:
+            async with AsyncSqliteSaver.from_conn_string(CHECKPOINT_DB) as checkpointer:
+                graph = create_graph(checkpointer=checkpointer)
+                yield
+        else:
+            from langgraph.checkpoint.memory import MemorySaver
+            graph = create_graph(checkpointer=MemorySaver())
+            yield
+    finally:
+        await browser_pool.stop()
+        fetcher = get_fetcher()
+        if fetcher:
+            await fetcher.close()
+        content_cache = get_content_cache()
+        if content_cache:
+            await content_cache.close()
+
+app = FastAPI(lifespan=lifespan)
 
 # Configure CORS
 app.add_middleware(
@@ -40,139 +79,206 @@ graph = create_graph()
 def read_root():
     return {"message": "Risk Assessment API is running"}
 
+@app.get("/api/channels")
+def channels():
+    # Backpressure metrics of every live assessment stream
+    from backend.shared_resources import channel_stats
+    return channel_stats()
+
+@app.get("/api/fetch/stats")
+def fetch_stats():
+    # How many page fetches each tier (HTTP fast path vs. Playwright) handled
+    fetcher = get_fetcher()
+    return fetcher.stats() if fetcher else None
+
+@app.get("/metrics")
+def metrics():
+    # Prometheus scrape target: stage latency histograms, stage errors, LLM tokens
+    from backend.metrics import registry
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/api/limits")
+def limits():
+    # Live state of the Gemini/CSE limiters: in-flight, AIMD limit, throttles, retries
+    from backend.scheduler import limiter_stats
+    return limiter_stats()
+
+@app.get("/api/settle")
+def settle_waits():
+    # Per browser tool: settle waits vs. the fixed sleeps they replaced
+    from backend.settle import settle_stats
+    return settle_stats()
+
+@app.get("/api/cache/stats")
+def cache_stats():
+    from backend.search import get_search_cache
+    from backend.graph_agent import get_grade_cache
+    from backend.tools import get_popup_cache
+    from backend.storage_state import get_storage_state_store
+    search_cache = get_search_cache()
+    content_cache = get_content_cache()
+    grade_cache = get_grade_cache()
+    popup_cache = get_popup_cache()
+    storage_states = get_storage_state_store()
+    return {
+        "search": search_cache.stats() if search_cache else None,
+        "content": content_cache.stats() if content_cache else None,
+        "grades": grade_cache.stats() if grade_cache else None,
+        "popups": popup_cache.stats() if popup_cache else None,
+        "storage_states": storage_states.stats() if storage_states else None,
+    }
+
+from fastapi import Header, HTTPException, Request
+from pydantic import ValidationError
 from fastapi.responses import StreamingResponse
 
-@app.post("/api/assess")
+async def execute_assessment(channel, inputs):
+    """
+    Runs (inputs given) or resumes (inputs None) the graph for the assessment that owns `channel`.
+    The graph checkpoints after every node under the assessment ID, so a resumed run
+    continues from the last completed node; one without any checkpoint restarts from its stored request.
+    """
+    config = {"configurable": {"assessment_id": channel.id, "thread_id": channel.id}}
+    # Spans of every node/search/LLM call/navigation in this run add up into one timing summary
+    trace = start_trace(channel.id)
+    
+    # Logs of already-completed nodes were recorded (and sent) before the interruption
+    snapshot = await graph.aget_state(config)
+    logs = snapshot.values.get("logs") if snapshot.values else None
+    next_seq = logs[-1]["seq"] + 1 if logs else 0
+    
+    if inputs is None and not snapshot.values:
+        # Interrupted before its first checkpoint (e.g. a batch item still queued): start over from the stored request
+        record = get_store().get(channel.id)
+        if record is None:
+            await channel.put(json.dumps({"type": "error", "message": "No checkpoint or request to resume this assessment from."}), critical=True)
+            return "error"
+        inputs = initial_state(record["request"])
+        await channel.put(json.dumps({"type": "log", "message": "♻️ No checkpoint yet, restarting assessment from its request..."}))
+    elif inputs is None:
+        await channel.put(json.dumps({"type": "log", "message": f"♻️ Resuming assessment from checkpoint (next: {', '.join(snapshot.next) or 'finished'})..."}))
+    
+    # Nodes push granular events (previews, agent logs, streamed summary/sections) straight
+    # to the channel; here we forward state logs (the latest numbered batch) and the final result.
+    final_state = snapshot.values or {}
+    if inputs is not None or snapshot.next:
+        async for final_state in graph.astream(inputs, config=config, stream_mode="values"):
+            # State holds only the latest batch of logs; forward the entries not sent yet
+            for entry in final_state.get("logs") or []:
+                if entry["seq"] >= next_seq:
+                    await channel.put(entry["event"])
+                    next_seq = entry["seq"] + 1
+    
+    # The summary itself was already streamed token by token from synthesize_node
+    status = "error"
+    if "report_data" in final_state:
+        await channel.put(json.dumps({"type": "result", "data": final_state["report_data"]}), critical=True)
+        status = "done"
+    await channel.put(json.dumps({"type": "timing", "data": trace.summary()}), critical=True)
+    return status
+
+def sse_response(assessment_id: str, after: int = 0):
+    """Streams an assessment's events after event `after`, resuming the run if nothing is executing it."""
+    from backend.assessments import get_run, start_run, replay
+    
+    run = get_run(assessment_id)
+    record = get_store().get(assessment_id)
+    if run is None and record["status"] in ("running", "interrupted"):
+        run = start_run(lambda channel: execute_assessment(channel, None), assessment_id)
+    
+    async def event_generator():
+        # Each event carries its sequence number as the SSE id; previews are live-only and unnumbered.
+        # Disconnecting only ends this stream: the run continues and can be re-joined with Last-Event-ID.
+        events = run.subscribe(after) if run else replay(assessment_id, after)
+        async for seq, event in events:
+            if seq is None:
+                yield f"data: {event}\n\n"
+            else:
+                yield f"id: {seq}\ndata: {event}\n\n"
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers={"X-Assessment-Id": assessment_id})
+
+def initial_state(request: dict) -> dict:
+    """Graph inputs for an AssessmentRequest (as a dict)."""
+    return {
+        "company_name": request["companyName"],
+        "address": request["companyAddress"],
+        "state": request["state"],
+        "company_type": request.get("companyType", "other"),
+        "logs": [],
+        "search_queries": [],
+        "raw_urls": [],
+        "raw_sources": [],
+        "filtered_urls": [],
+        "content": []
+    }
+
 @app.post("/api/assess")
 async def assess_company(request: AssessmentRequest):
-    async def stream_graph():
-        inputs = {
-            "company_name": request.companyName,
-            "address": request.companyAddress,
-            "state": request.state,
-            "company_type": request.companyType,
-            "logs": []
-        }
-        
+    from backend.assessments import start_run
+    
+    inputs = initial_state(request.model_dump())
+    
+    # Each assessment gets its own channel (and checkpoint thread) under one ID
+    async def work(channel):
+        # First event: the ID to reconnect with via GET /api/assess/{id}/events
+        await channel.put(json.dumps({"type": "assessment", "id": channel.id}), critical=True)
+        return await execute_assessment(channel, inputs)
+    
+    run = start_run(work, request=request.model_dump())
+    return sse_response(run.id)
+
+@app.post("/api/assess/batch")
+async def assess_batch(http_request: Request):
+    """
+    Screens many companies at once. Accepts a JSON list of AssessmentRequests (or {"companies": [...]})
+    or a CSV upload (Content-Type: text/csv) with matching column names, and streams the batch feed.
+    """
+    from backend.batch import parse_csv, start_batch
+    
+    if "csv" in http_request.headers.get("content-type", ""):
+        rows = parse_csv((await http_request.body()).decode("utf-8", errors="replace"))
+    else:
         try:
-            async for output in graph.astream(inputs):
-                for node_name, node_output in output.items():
-                    # Stream logs
-                    if "logs" in node_output:
-                        for log in node_output["logs"]:
-                            # Avoid re-sending old logs if they are accumulated (my nodes return new logs mostly, but let's be safe)
-                            # Actually my nodes return a list of logs. In 'research_node' I append to state['logs'].
-                            # But the output of the node function is what is yielded here.
-                            # In research_node I return {"logs": logs}. 'logs' there is the FULL list.
-                            # Ah, that's a problem. I should only return the NEW logs in the node output if I want to stream them efficiently.
-                            # Or I can just handle it here.
-                            # Let's assume for now I'll just yield the last one or all of them? 
-                            # If I yield all, the frontend will duplicate.
-                            # I should fix graph_agent.py to only return NEW logs in the output, while updating the state with ALL logs.
-                            # But wait, langgraph state updates merge.
-                            # If I return {"logs": [...]}, it overwrites or appends depending on reducer.
-                            # I used TypedDict, so it overwrites.
-                            # So state["logs"] will be whatever the last node returned.
-                            # This means I need to be careful.
-                            # Let's just yield the logs that are in the output.
-                            # But if research_node returns ALL logs, I will yield ALL logs.
-                            pass
-                            
-                    # For now, let's assume the nodes return what they want to be in the state.
-                    # I will modify this logic to just yield the message directly if I can.
-                    # Actually, let's look at my graph_agent.py again.
-                    # research_node: logs.append(...); return {"logs": logs} -> returns ALL logs.
-                    # This is bad for streaming.
-                    # I should fix graph_agent.py first?
-                    # Or I can just filter here.
-                    # But filtering here is hard without keeping state.
-                    
-                    # Let's just yield the messages.
-                    # Actually, let's fix graph_agent.py to return "new_logs" key?
-                    # No, let's just use the fact that I can see the output.
-                    # If I change graph_agent to only return the NEW logs in a separate key, say "stream_logs", that would be better.
-                    # But I can't easily change the state definition now without re-writing it.
-                    
-                    # Alternative: In main.py, keep track of sent logs.
-                    pass
-
-            # Re-reading graph_agent.py:
-            # logs = state.get("logs", [])
-            # logs.append(...)
-            # return {..., "logs": logs}
-            # So yes, it returns the full list.
-            
-            # I will implement a local `sent_logs` set/count in `stream_graph` to dedup.
-            
-        except Exception as e:
-            yield json.dumps({"type": "error", "message": str(e)}) + "\n"
-
-    # Let's write the actual generator
+            payload = await http_request.json()
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Expected a JSON list or a CSV body")
+        rows = payload.get("companies", []) if isinstance(payload, dict) else payload
+    
+    try:
+        requests = [AssessmentRequest(**row).model_dump() for row in rows]
+    except (ValidationError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    if not requests:
+        raise HTTPException(status_code=400, detail="No companies to assess")
+    
+    batch = start_batch(requests, execute_assessment, initial_state)
+    
     async def event_generator():
-        from backend.shared_resources import event_queue
-        
-        inputs = {
-            "company_name": request.companyName,
-            "address": request.companyAddress,
-            "state": request.state,
-            "company_type": request.companyType,
-            "logs": [],
-            "search_queries": [],
-            "raw_urls": [],
-            "filtered_urls": [],
-            "content": []
-        }
-        
-        # Start graph execution in background
-        async def run_graph():
-            try:
-                async for output in graph.astream(inputs):
-                    # We can still push major state updates to the queue if needed, 
-                    # or just let the queue handle the granular stuff and use this for final result.
-                    # For simplicity, let's push everything to the queue from here too.
-                    
-                    for node_name, node_output in output.items():
-                        if "logs" in node_output:
-                            # We might get duplicate logs here if we aren't careful, 
-                            # but let's assume the queue is the primary source for "live" logs now.
-                            # Actually, let's NOT push logs from here if we are pushing them from the nodes.
-                            # But research_node pushes to logs list, it doesn't push to queue yet (I only updated browse_node).
-                            # So we still need to yield logs from here for other nodes.
-                            
-                            # To avoid complexity, let's just yield everything from here to the queue as well.
-                            for log_str in node_output["logs"]:
-                                await event_queue.put(log_str)
-                        
-                        if node_name == "synthesize":
-                            if "summary" in node_output:
-                                await event_queue.put(json.dumps({"type": "summary", "content": node_output["summary"]}))
-                            if "report_data" in node_output:
-                                await event_queue.put(json.dumps({"type": "result", "data": node_output["report_data"]}))
-                                
-            except Exception as e:
-                await event_queue.put(json.dumps({"type": "error", "message": str(e)}))
-            finally:
-                # Signal end of stream
-                await event_queue.put(None)
-
-        # Start the graph task
-        asyncio.create_task(run_graph())
-        
-        # Consume the queue
-        sent_logs = set()
-        
-        while True:
-            event = await event_queue.get()
-            if event is None:
-                break
-            
-            # Dedup logs
-            if event not in sent_logs:
-                yield f"data: {event}\n\n"
-                # Only track logs for dedup, not images (images are large)
-                if "type" in event and "log" in event: 
-                    sent_logs.add(event)
-            
-            event_queue.task_done()
+        async for event in batch.events():
+            yield f"data: {event}\n\n"
+    
+    return StreamingResponse(event_generator(), media_type="text/event-stream", headers={"X-Batch-Id": batch.id})
+
+@app.get("/api/assess/batch/{batch_id}")
+def batch_status(batch_id: str):
+    from backend.batch import get_batch
+    batch = get_batch(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail="Unknown or finished batch")
+    return {"id": batch.id, "items": batch.items, **batch.aggregate()}
+
+@app.get("/api/assess/{assessment_id}")
+def assessment_status(assessment_id: str):
+    record = get_store().get(assessment_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown assessment")
+    return record
 
-    return StreamingResponse(event_generator(), media_type="text/event-stream")
+@app.get("/api/assess/{assessment_id}/events")
+async def assessment_events(assessment_id: str, last_event_id: str | None = Header(None, alias="Last-Event-ID")):
+    """Replays events after Last-Event-ID, then follows the run live (resuming it if it was interrupted)."""
+    if get_store().get(assessment_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown assessment")
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else 0
+    return sse_response(assessment_id, after)
@@ -0,0 +1,164 @@
+import os
+import time
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+# Upper bounds (seconds) of the latency histograms; +Inf is implicit
+BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300)
+
+# USD per million tokens, for the cost estimate (defaults: gemini-2.0-flash list prices)
+PRICE_INPUT_PER_M = float(os.getenv("GEMINI_PRICE_INPUT_PER_M", "0.10"))
+PRICE_OUTPUT_PER_M = float(os.getenv("GEMINI_PRICE_OUTPUT_PER_M", "0.40"))
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Registry:
+    """Process-wide span histograms and token/error counters, rendered in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()  # Spans also close in worker threads (search)
+        self.spans = {}    # (kind, name) -> Histogram
+        self.errors = {}   # (kind, name) -> count
+        self.tokens = {}   # (model, direction) -> count
+
+    def observe(self, kind: str, name: str, seconds: float, error: bool):
+        with self._lock:
+            self.spans.setdefault((kind, name), Histogram()).observe(seconds)
+            if error:
+                self.errors[(kind, name)] = self.errors.get((kind, name), 0) + 1
+
+    def add_tokens(self, model: str, prompt: int, completion: int):
+        with self._lock:
+            self.tokens[(model, "prompt")] = self.tokens.get((model, "prompt"), 0) + prompt
+            self.tokens[(model, "completion")] = self.tokens.get((model, "completion"), 0) + completion
+
+    def render(self) -> str:
+        lines = [
+            "# HELP assessment_span_seconds Duration of traced stages (graph nodes, searches, LLM calls, navigations, browser tools).",
+            "# TYPE assessment_span_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), hist in sorted(self.spans.items()):
+                labels = f'kind="{kind}",name="{_escape(name)}"'
+                cumulative = 0
+                for bound, count in zip(BUCKETS, hist.counts):
+                    cumulative += count
+                    lines.append(f'assessment_span_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'assessment_span_seconds_bucket{{{labels},le="+Inf"}} {hist.count}')
+                lines.append(f"assessment_span_seconds_sum{{{labels}}} {hist.sum:.6f}")
+                lines.append(f"assessment_span_seconds_count{{{labels}}} {hist.count}")
+
+            lines += ["# HELP assessment_span_errors_total Traced stages that raised.", "# TYPE assessment_span_errors_total counter"]
+            for (kind, name), count in sorted(self.errors.items()):
+                lines.append(f'assessment_span_errors_total{{kind="{kind}",name="{_escape(name)}"}} {count}')
+
+            lines += ["# HELP assessment_llm_tokens_total LLM tokens used.", "# TYPE assessment_llm_tokens_total counter"]
+            for (model, direction), count in sorted(self.tokens.items()):
+                lines.append(f'assessment_llm_tokens_total{{model="{_escape(model)}",direction="{direction}"}} {count}')
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class Trace:
+    """Per-assessment aggregate of its spans and token usage (sent as the final `timing` event)."""
+
+    def __init__(self, assessment_id: str = None):
+        self.assessment_id = assessment_id
+        self.started = time.perf_counter()
+        self.stages = {}   # "kind:name" -> {"count", "total", "max", "errors"}
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def record(self, kind: str, name: str, seconds: float, error: bool):
+        stage = self.stages.setdefault(f"{kind}:{name}", {"count": 0, "total": 0.0, "max": 0.0, "errors": 0})
+        stage["count"] += 1
+        stage["total"] += seconds
+        stage["max"] = max(stage["max"], seconds)
+        stage["errors"] += error
+
+    def summary(self) -> dict:
+        cost = (self.prompt_tokens * PRICE_INPUT_PER_M + self.completion_tokens * PRICE_OUTPUT_PER_M) / 1e6
+        return {
+            "assessment_id": self.assessment_id,
+            "wall_seconds": round(time.perf_counter() - self.started, 3),
+            "stages": {
+                key: {**stage, "total": round(stage["total"], 3), "max": round(stage["max"], 3)}
+                for key, stage in sorted(self.stages.items(), key=lambda item: -item[1]["total"])
+            },
+            "tokens": {"prompt": self.prompt_tokens, "completion": self.completion_tokens},
+            "estimated_cost_usd": round(cost, 6),
+        }
+
+
+registry = Registry()
+# The trace of the assessment the current task belongs to (inherited by child tasks and to_thread)
+current_trace: contextvars.ContextVar[Trace | None] = contextvars.ContextVar("current_trace", default=None)
+
+
+def start_trace(assessment_id: str) -> Trace:
+    trace = Trace(assessment_id)
+    current_trace.set(trace)
+    return trace
+
+
+@contextmanager
+def span(kind: str, name: str):
+    """Times a block into the /metrics histograms and the current assessment's trace."""
+    started = time.perf_counter()
+    error = False
+    try:
+        yield
+    except BaseException:
+        error = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        registry.observe(kind, name, seconds, error)
+        trace = current_trace.get()
+        if trace is not None:
+            trace.record(kind, name, seconds, error)
+
+
+def traced(kind: str, name: str = None):
+    """Decorator form of `span` for async functions (keeps the signature visible to LangGraph/LangChain)."""
+    def decorate(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            with span(kind, name or func.__name__):
+                return await func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def record_tokens(model: str, usage: dict | None):
+    """Adds an LLM call's usage_metadata to the counters and the current trace."""
+    if not usage:
+        return
+    prompt = usage.get("input_tokens", 0) or 0
+    completion = usage.get("output_tokens", 0) or 0
+    registry.add_tokens(model, prompt, completion)
+    trace = current_trace.get()
+    if trace is not None:
+        trace.prompt_tokens += prompt
+        trace.completion_tokens += completion
@@ -117,3 +117,11 @@ class RiskReport(BaseModel):
 class FullAssessmentResponse(BaseModel):
     companyInfo: CompanyInfo
     riskReport: RiskReport
+
+class UrlGrade(BaseModel):
+    index: int
+    relevant: bool
+    reason: str
+
+class UrlGradeBatch(BaseModel):
+    grades: List[UrlGrade]
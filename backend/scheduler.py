@@ -0,0 +1,31 @@
+import os
+import asyncio
+from backend.limiter import AdaptiveLimiter
+
+# Process-wide budgets shared by every assessment, whether started alone or as part of a batch.
+# Concurrent browsers are capped by the browser pool (BROWSER_POOL_MAX_CONTEXTS); caches are
+# process-wide singletons, so companies in a batch reuse each other's searches, pages and grades.
+GEMINI_RPS = float(os.getenv("GEMINI_RPS", "5"))
+CSE_QPS = float(os.getenv("CSE_QPS", "5"))
+BATCH_MAX_CONCURRENT = int(os.getenv("BATCH_MAX_CONCURRENT", "3"))
+
+# Token bucket + AIMD concurrency + jittered retries; both back off on 429/503
+llm_limiter = AdaptiveLimiter(
+    "gemini",
+    rate=GEMINI_RPS,
+    max_concurrency=int(os.getenv("GEMINI_MAX_CONCURRENCY", "16")),
+    retries=int(os.getenv("GEMINI_RETRIES", "3")),
+)
+search_limiter = AdaptiveLimiter(
+    "cse",
+    rate=CSE_QPS,
+    max_concurrency=int(os.getenv("SEARCH_MAX_CONCURRENCY", "8")),
+    retries=int(os.getenv("SEARCH_RETRIES", "2")),
+)
+
+# Batch items run at most this many at a time; the rest wait in FIFO order
+batch_slots = asyncio.Semaphore(BATCH_MAX_CONCURRENT)
+
+
+def limiter_stats() -> dict:
+    return {"gemini": llm_limiter.stats(), "search": search_limiter.stats()}
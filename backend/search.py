@@ -0,0 +1,141 @@
+import os
+import asyncio
+import threading
+from langchain_community.utilities import GoogleSearchAPIWrapper
+from backend.cache import SqliteCache
+from backend.metrics import span
+
+
+def _default_wrapper() -> GoogleSearchAPIWrapper:
+    return GoogleSearchAPIWrapper(
+        google_api_key=os.getenv("GOOGLE_API_KEY"),
+        google_cse_id=os.getenv("GOOGLE_CSE_ID")
+    )
+
+
+_search_cache = None
+
+
+def get_search_cache() -> SqliteCache | None:
+    """
+    Shared on-disk cache of CSE results, or None when SEARCH_CACHE_TTL=0.
+    Entries are fresh for SEARCH_CACHE_TTL seconds and served stale (while
+    revalidating) for another SEARCH_CACHE_MAX_STALE seconds.
+    """
+    global _search_cache
+    ttl = float(os.getenv("SEARCH_CACHE_TTL", str(24 * 3600)))
+    if ttl <= 0:
+        return None
+    if _search_cache is None:
+        _search_cache = SqliteCache(
+            "search_results",
+            ttl=ttl,
+            max_stale=float(os.getenv("SEARCH_CACHE_MAX_STALE", str(7 * 24 * 3600))),
+            max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "5000")),
+        )
+    return _search_cache
+
+
+def cache_key(query: str, num_results: int) -> str:
+    # Case and whitespace don't change CSE results
+    return f"{' '.join(query.lower().split())}|{num_results}"
+
+
+class AsyncSearch:
+    """
+    Non-blocking fan-out over the (synchronous) Google CSE wrapper.
+
+    Each query runs in a worker thread so the event loop stays free, at most
+    `max_concurrency` worker threads run at once (a query that timed out keeps its
+    slot until its thread returns) and each caller waits at most `timeout`.
+    The underlying googleapiclient/httplib2 client is not thread-safe, so every
+    worker thread gets its own wrapper from `wrapper_factory`.
+
+    With a `cache`, fresh hits skip the API entirely and stale hits are served
+    immediately while a background refresh updates the entry. With a `limiter`
+    (an AdaptiveLimiter), API calls are rate limited, back off on 429/503 and are retried.
+    """
+
+    def __init__(self, wrapper_factory=None, max_concurrency: int = None, timeout: float = None, cache: SqliteCache | None = None, limiter=None):
+        self.wrapper_factory = wrapper_factory or _default_wrapper
+        self.max_concurrency = max_concurrency or int(os.getenv("SEARCH_MAX_CONCURRENCY", "8"))
+        self.timeout = timeout or float(os.getenv("SEARCH_TIMEOUT", "10"))
+        self.cache = cache
+        self.limiter = limiter
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._local = threading.local()
+        self._refreshing = {}  # key -> background revalidation task
+
+    def _wrapper(self) -> GoogleSearchAPIWrapper:
+        if not hasattr(self._local, "wrapper"):
+            self._local.wrapper = self.wrapper_factory()
+        return self._local.wrapper
+
+    def _results_sync(self, query: str, num_results: int) -> list[dict]:
+        return self._wrapper().results(query, num_results)
+
+    async def results(self, query: str, num_results: int) -> list[dict]:
+        """Runs one query off the event loop (or serves it from cache). Raises on error or timeout."""
+        if self.cache is None:
+            return await self._fetch(query, num_results)
+
+        key = cache_key(query, num_results)
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            results, fresh = cached
+            if not fresh and key not in self._refreshing:
+                self._refreshing[key] = asyncio.create_task(self._revalidate(key, query, num_results))
+            return results
+
+        results = await self._fetch(query, num_results)
+        await self.cache.aset(key, results)
+        return results
+
+    async def _revalidate(self, key: str, query: str, num_results: int):
+        try:
+            await self.cache.aset(key, await self._fetch(query, num_results))
+        except Exception:
+            pass  # Keep serving the stale entry; the next read retries
+        finally:
+            self._refreshing.pop(key, None)
+
+    def _worker_done(self, worker: asyncio.Future):
+        self._semaphore.release()
+        if not worker.cancelled():
+            worker.exception()  # Retrieved here so abandoned (timed-out) failures are not reported as unhandled
+
+    async def _fetch(self, query: str, num_results: int) -> list[dict]:
+        async def call():
+            await self._semaphore.acquire()
+            worker = asyncio.ensure_future(asyncio.to_thread(self._results_sync, query, num_results))
+            # A timed-out query stops being awaited but its thread keeps running, so the slot is
+            # released when the thread finishes: max_concurrency bounds threads, not just waiters
+            worker.add_done_callback(self._worker_done)
+            return await asyncio.wait_for(asyncio.shield(worker), timeout=self.timeout)
+
+        with span("search", "cse"):
+            if self.limiter is None:
+                return await call()
+            return await self.limiter.run(call)
+
+    async def results_many(self, queries: list[str], num_results: int) -> list:
+        """
+        Runs all queries concurrently. Returns one entry per query, in order:
+        the result list, or the exception that query raised.
+        """
+        return await asyncio.gather(
+            *(self.results(q, num_results) for q in queries),
+            return_exceptions=True
+        )
+
+
+_default_search = None
+
+
+def get_search() -> AsyncSearch:
+    """Process-wide, cached AsyncSearch built from GOOGLE_API_KEY / GOOGLE_CSE_ID."""
+    global _default_search
+    if _default_search is None:
+        from backend.scheduler import search_limiter
+        _default_search = AsyncSearch(cache=get_search_cache(), limiter=search_limiter)
+    return _default_search
@@ -0,0 +1,140 @@
+import os
+import time
+import asyncio
+from playwright.async_api import Page
+from backend.metrics import span
+
+# A page is settled once the DOM and scroll height have not changed, and at most
+# SETTLE_MAX_INFLIGHT requests have been pending, for SETTLE_QUIET_MS
+SETTLE_QUIET_MS = int(os.getenv("SETTLE_QUIET_MS", "300"))
+# Beacons, long polls and analytics pings never finish; tolerate a couple (like networkidle2)
+SETTLE_MAX_INFLIGHT = int(os.getenv("SETTLE_MAX_INFLIGHT", "2"))
+
+# Resolves once nothing was added/removed/retyped in the DOM and the scroll height held
+# for `quietMs`, or after `timeoutMs`. Attribute changes are ignored: animations and the
+# preview cursor change styles constantly.
+WAIT_FOR_DOM_QUIET = """
+([quietMs, timeoutMs]) => new Promise(resolve => {
+    const root = document.documentElement;
+    const started = performance.now();
+    let last = started;
+    let height = root.scrollHeight;
+    const observer = new MutationObserver(() => { last = performance.now(); });
+    observer.observe(root, { childList: true, subtree: true, characterData: true });
+    const timer = setInterval(() => {
+        const now = performance.now();
+        if (root.scrollHeight !== height) {
+            height = root.scrollHeight;
+            last = now;
+        }
+        if (now - last >= quietMs || now - started >= timeoutMs) {
+            clearInterval(timer);
+            observer.disconnect();
+            resolve(now - last >= quietMs);
+        }
+    }, 50);
+})
+"""
+
+
+class Settler:
+    """
+    Waits for a page to settle after an action instead of sleeping a fixed time.
+
+    Tracks the page's in-flight requests from the moment it is created, so create it
+    before navigating. Each wait is capped, timed under span("settle", name), and
+    compared with the fixed sleep it replaces (`baseline`) in the per-name stats.
+    """
+
+    def __init__(self, page: Page):
+        self.page = page
+        self.inflight = set()
+        self.last_network = time.monotonic()
+        self.stats = {}   # name -> {"waits", "waited", "baseline"}
+        page.on("request", self._started)
+        page.on("requestfinished", self._finished)
+        page.on("requestfailed", self._finished)
+
+    def _started(self, request):
+        self.inflight.add(request)
+        self.last_network = time.monotonic()
+
+    def _finished(self, request):
+        self.inflight.discard(request)
+        self.last_network = time.monotonic()
+
+    def _network_idle_for(self) -> float:
+        """Seconds the network has been idle, or 0 while it is busy."""
+        if len(self.inflight) > SETTLE_MAX_INFLIGHT:
+            return 0.0
+        return time.monotonic() - self.last_network
+
+    async def settle(self, name: str, max_wait: float, baseline: float) -> float:
+        """Waits until network, DOM and scroll height are quiet (or `max_wait` passes). Returns seconds waited."""
+        quiet = SETTLE_QUIET_MS / 1000
+        started = time.monotonic()
+        deadline = started + max_wait
+        with span("settle", name):
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    dom_quiet = await self.page.evaluate(WAIT_FOR_DOM_QUIET, [SETTLE_QUIET_MS, remaining * 1000])
+                except Exception:
+                    # The action navigated: the old document is gone, wait for the new one
+                    if self.page.is_closed():
+                        break
+                    try:
+                        await self.page.wait_for_load_state("domcontentloaded", timeout=max(1, (deadline - time.monotonic()) * 1000))
+                    except Exception:
+                        break
+                    continue
+                if not dom_quiet:
+                    break  # Hit the cap
+                idle = self._network_idle_for()
+                if idle >= quiet:
+                    break
+                # Give the network the rest of its quiet window, then re-check the DOM
+                await asyncio.sleep(min(quiet - idle if idle else quiet, max(0, deadline - time.monotonic())))
+        waited = time.monotonic() - started
+        self.record(name, waited, baseline)
+        return waited
+
+    def record(self, name: str, waited: float, baseline: float):
+        stat = self.stats.setdefault(name, {"waits": 0, "waited": 0.0, "baseline": 0.0})
+        stat["waits"] += 1
+        stat["waited"] += waited
+        stat["baseline"] += baseline
+        _record_totals(name, waited, baseline)
+
+    def summary(self) -> str:
+        """One-line per-name breakdown for agent logs."""
+        return ", ".join(
+            f"{name} {s['waits']}× {s['waited']:.1f}s (saved {s['baseline'] - s['waited']:.1f}s)"
+            for name, s in self.stats.items()
+        )
+
+
+# Process-wide totals for /api/settle
+_totals = {}
+
+
+def _record_totals(name: str, waited: float, baseline: float):
+    stat = _totals.setdefault(name, {"waits": 0, "waited": 0.0, "baseline": 0.0})
+    stat["waits"] += 1
+    stat["waited"] += waited
+    stat["baseline"] += baseline
+
+
+def settle_stats() -> dict:
+    """Per tool: waits, seconds waited, seconds the fixed sleeps would have taken, and the difference."""
+    return {
+        name: {
+            "waits": s["waits"],
+            "waited_seconds": round(s["waited"], 3),
+            "baseline_seconds": round(s["baseline"], 3),
+            "saved_seconds": round(s["baseline"] - s["waited"], 3),
+        }
+        for name, s in _totals.items()
+    }
@@ -1,5 +1,137 @@
+import os
+import uuid
 import asyncio
+from collections import deque
+from backend.browser_pool import BrowserPool
 
-# Global event queue for real-time streaming (logs, screenshots, etc.)
-# This allows deep-nested agents to push updates directly to the frontend stream
-event_queue = asyncio.Queue()
+
+class EventChannel:
+    """
+    Real-time event stream (logs, screenshots, etc.) for a single assessment.
+    Deep-nested agents push updates here; the SSE endpoint of that assessment consumes them.
+
+    The buffer is bounded and priority-aware:
+    - critical events (results, summaries, errors) are never dropped and never wait
+    - logs keep their order; producers wait (backpressure) while `max_size` logs are pending
+    - preview frames are coalesced per agent, so only each agent's newest frame is buffered
+    Ordered events are always delivered before buffered previews.
+    """
+
+    def __init__(self, channel_id: str = None, max_size: int = None):
+        self.id = channel_id or uuid.uuid4().hex
+        self.max_size = max_size or int(os.getenv("EVENT_CHANNEL_MAX_SIZE", "1000"))
+        self._events = deque()   # Logs and critical events, in order
+        self._previews = {}      # agent_id -> newest preview frame
+        self._cond = asyncio.Condition()
+        self._closed = False
+
+        # Backpressure metrics
+        self.max_depth = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.blocked = 0
+
+    @property
+    def depth(self) -> int:
+        return len(self._events) + len(self._previews)
+
+    async def put(self, event: str, critical: bool = False):
+        async with self._cond:
+            if not critical and len(self._events) >= self.max_size:
+                self.blocked += 1
+                await self._cond.wait_for(lambda: len(self._events) < self.max_size or self._closed)
+            if self._closed:
+                self.dropped += 1
+                return
+            self._events.append(event)
+            self.max_depth = max(self.max_depth, self.depth)
+            self._cond.notify_all()
+
+    async def put_preview(self, agent_id: str, event: str):
+        """Buffers a preview frame, replacing any not-yet-sent frame from the same agent."""
+        async with self._cond:
+            if self._closed:
+                self.dropped += 1
+                return
+            if self._previews.pop(agent_id, None) is not None:
+                self.coalesced += 1
+            self._previews[agent_id] = event
+            self.max_depth = max(self.max_depth, self.depth)
+            self._cond.notify_all()
+
+    async def get(self):
+        """Returns the next event, or None once the channel has been closed and drained."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._events or self._previews or self._closed)
+            if self._events:
+                event = self._events.popleft()
+                self._cond.notify_all()  # Wake producers waiting for space
+                return event
+            if self._previews:
+                agent_id = next(iter(self._previews))
+                return self._previews.pop(agent_id)
+            return None
+
+    async def get_many(self, limit: int) -> list:
+        """Like get(), but also takes up to `limit` events already waiting behind the first; [] once closed and drained."""
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._events or self._previews or self._closed)
+            batch = []
+            while self._events and len(batch) < limit:
+                batch.append(self._events.popleft())
+            while self._previews and len(batch) < limit:
+                batch.append(self._previews.pop(next(iter(self._previews))))
+            self._cond.notify_all()  # Wake producers waiting for space
+            return batch
+
+    async def close(self):
+        # Signal end of stream to this channel's consumer only
+        async with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "blocked": self.blocked,
+        }
+
+
+# Open channels keyed by assessment ID
+_channels: dict[str, EventChannel] = {}
+
+
+def open_channel(channel_id: str = None) -> EventChannel:
+    channel = EventChannel(channel_id)
+    _channels[channel.id] = channel
+    return channel
+
+
+def get_channel(channel_id: str) -> EventChannel | None:
+    return _channels.get(channel_id)
+
+
+def release_channel(channel_id: str):
+    _channels.pop(channel_id, None)
+
+
+def channel_stats() -> dict:
+    return {channel_id: channel.stats() for channel_id, channel in _channels.items()}
+
+
+def channel_from_config(config: dict | None) -> EventChannel:
+    """Resolves the assessment's channel from a LangGraph run config."""
+    channel_id = ((config or {}).get("configurable") or {}).get("assessment_id")
+    channel = get_channel(channel_id) if channel_id else None
+    if channel is None:
+        # Runs without a registered channel (scripts, tests) get a closed one that discards events
+        channel = EventChannel(channel_id)
+        channel._closed = True
+    return channel
+
+
+# Process-wide Chromium pool, started in the FastAPI lifespan (lazily elsewhere)
+browser_pool = BrowserPool()
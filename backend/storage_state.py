@@ -0,0 +1,128 @@
+import os
+import json
+import ipaddress
+from urllib.parse import urlsplit
+from playwright.async_api import BrowserContext
+from backend.cache import SqliteCache
+
+# Suffixes under which names are registered one level deeper (a short list, not the full PSL)
+MULTI_LABEL_SUFFIXES = {
+    "co.uk", "org.uk", "ac.uk", "gov.uk", "com.au", "net.au", "org.au", "co.nz", "co.jp",
+    "co.in", "com.br", "com.mx", "co.za", "com.cn", "com.sg", "com.hk", "com.tr",
+}
+
+# Metered paywalls count visits in cookies/localStorage; a persisted state would use up the meter
+DEFAULT_OPT_OUT = "nytimes.com,wsj.com,ft.com,bloomberg.com,washingtonpost.com,economist.com,businessinsider.com"
+
+
+def registrable_domain(url: str) -> str:
+    """example.co.uk for https://www.shop.example.co.uk/x; IP addresses are returned as-is."""
+    host = (urlsplit(url).hostname or "").lower().rstrip(".")
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    depth = 3 if ".".join(labels[-2:]) in MULTI_LABEL_SUFFIXES else 2
+    return ".".join(labels[-depth:])
+
+
+def _within(host: str, domain: str) -> bool:
+    host = host.lstrip(".").lower()
+    return host == domain or host.endswith("." + domain)
+
+
+class StorageStateStore:
+    """
+    Playwright storage states (cookies + localStorage) keyed by registrable domain.
+
+    A state is saved once a popup was dismissed on a page, trimmed to that domain's cookies
+    and origins, and seeds the next context opened for the domain, so consent banners and
+    "stay signed out" dialogs stay dismissed. States over `max_entry_bytes` are not kept;
+    the table as a whole is capped at `max_bytes` (LRU) and entries expire after `ttl`.
+    """
+
+    def __init__(self, ttl: float, max_bytes: int, max_entry_bytes: int, opt_out: set):
+        self.store = SqliteCache("storage_states", ttl=ttl, max_bytes=max_bytes)
+        self.max_entry_bytes = max_entry_bytes
+        self.opt_out = opt_out
+        self.saved = 0
+        self.oversized = 0
+
+    def allowed(self, domain: str) -> bool:
+        return bool(domain) and not any(_within(domain, o) for o in self.opt_out)
+
+    async def get(self, url: str) -> dict | None:
+        """The stored state for `url`'s domain, ready for `new_context(storage_state=...)`."""
+        domain = registrable_domain(url)
+        if not self.allowed(domain):
+            return None
+        cached = await self.store.aget(domain)
+        return cached[0] if cached else None
+
+    async def save(self, context: BrowserContext, url: str, page_url: str = None) -> bool:
+        """
+        Stores the context's state under `url`'s domain (the URL callers look states up by).
+        When the page ended up elsewhere (`page_url`, e.g. after a cross-domain redirect),
+        that domain's cookies and origins are kept too. Returns whether it was kept.
+        """
+        domain = registrable_domain(url)
+        domains = {domain, registrable_domain(page_url)} if page_url else {domain}
+        if not all(self.allowed(d) for d in domains):
+            return False
+        state = await context.storage_state()
+        state = {
+            "cookies": [c for c in state.get("cookies", []) if any(_within(c.get("domain", ""), d) for d in domains)],
+            "origins": [o for o in state.get("origins", []) if any(_within(urlsplit(o.get("origin", "")).hostname or "", d) for d in domains)],
+        }
+        if not state["cookies"] and not state["origins"]:
+            return False
+        if len(json.dumps(state)) > self.max_entry_bytes:
+            self.oversized += 1
+            return False
+        await self.store.aset(domain, state)
+        self.saved += 1
+        return True
+
+    def stats(self) -> dict:
+        return {**self.store.stats(), "saved": self.saved, "oversized": self.oversized}
+
+
+_storage_states = None
+
+
+def get_storage_state_store() -> StorageStateStore | None:
+    """Shared per-domain storage state store, or None when STORAGE_STATE_TTL=0."""
+    global _storage_states
+    ttl = float(os.getenv("STORAGE_STATE_TTL", str(7 * 24 * 3600)))
+    if ttl <= 0:
+        return None
+    if _storage_states is None:
+        _storage_states = StorageStateStore(
+            ttl=ttl,
+            max_bytes=int(os.getenv("STORAGE_STATE_MAX_BYTES", str(20 * 1024 * 1024))),
+            max_entry_bytes=int(os.getenv("STORAGE_STATE_MAX_ENTRY_BYTES", str(64 * 1024))),
+            opt_out={d.strip().lower() for d in os.getenv("STORAGE_STATE_OPT_OUT", DEFAULT_OPT_OUT).split(",") if d.strip()},
+        )
+    return _storage_states
+
+
+async def load_state(url: str) -> dict | None:
+    """The saved state for `url`'s domain, to seed a new context with (`storage_state=`), or None."""
+    states = get_storage_state_store()
+    return await states.get(url) if states else None
+
+
+async def refresh_state(context: BrowserContext, url: str, page_url: str = None):
+    """
+    Re-saves the state of a context that was seeded from a saved one, before it closes, so
+    rotated consent cookies and the TTL stay current. New states only come from verified
+    popup dismissals (see BrowserActions.close_popup). Never raises.
+    """
+    states = get_storage_state_store()
+    if states:
+        try:
+            await states.save(context, url, page_url)
+        except Exception:
+            pass
@@ -1,33 +1,244 @@
+import os
 import json
+import time
 import asyncio
 import base64
+import hashlib
+from urllib.parse import urlsplit
 from langchain_core.tools import tool
 from playwright.async_api import Page
+from backend.shared_resources import EventChannel
+from backend.metrics import traced
+from backend.cache import SqliteCache
+from backend.settle import Settler
+from backend.storage_state import get_storage_state_store
+
+# Live preview pipeline settings
+PREVIEW_SCALE = float(os.getenv("PREVIEW_SCALE", "0.5"))     # Fraction of the viewport size
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "40"))    # JPEG quality
+PREVIEW_MAX_FPS = float(os.getenv("PREVIEW_MAX_FPS", "2"))   # Per agent
+
+# Characters read_page may return per document, summed over all of its reads
+READ_PAGE_BUDGET = int(os.getenv("READ_PAGE_BUDGET", "5000"))
+
+# Incremental reader. State lives on the document, so a navigation starts a fresh page:
+# - a MutationObserver marks the DOM dirty, so a read after a scroll that loaded nothing skips innerText
+# - lines already returned are remembered and never returned again
+# - the character budget is spent across reads instead of per call
+READ_NEW_TEXT = """
+(budget) => {
+    let state = window.__fieldAgentRead;
+    if (!state) {
+        state = window.__fieldAgentRead = { seen: new Set(), used: 0, dirty: true };
+        new MutationObserver(() => { state.dirty = true; })
+            .observe(document.documentElement, { childList: true, subtree: true, characterData: true });
+    }
+    const left = Math.max(0, budget - state.used);
+    if (!state.dirty || left === 0) {
+        return { text: '', used: state.used, skipped: !state.dirty, exhausted: left === 0 };
+    }
+    state.dirty = false;
+    const fresh = [];
+    let size = 0;
+    for (const raw of (document.body ? document.body.innerText : '').split('\\n')) {
+        const line = raw.split(/\\s+/).filter(Boolean).join(' ');
+        if (!line || state.seen.has(line)) continue;
+        const sep = fresh.length ? 1 : 0;  // The space join() puts before this line
+        if (size + sep + line.length > left) {
+            const cut = line.slice(0, Math.max(0, left - size - sep));
+            if (cut) fresh.push(cut);
+            size = left;
+            break;
+        }
+        state.seen.add(line);
+        fresh.push(line);
+        size += sep + line.length;
+    }
+    state.used += size;
+    return { text: fresh.join(' ').trim(), used: state.used, skipped: false, exhausted: state.used >= budget };
+}
+"""
+
+CLOSE_SELECTORS = [
+    "button[aria-label='Close']", ".close", "#close-button",
+    "button:has-text('No thanks')", "button:has-text('Not now')",
+    "button:has-text('Accept all')", "button:has-text('Accept Cookies')",
+    "[aria-label='Close modal']", "button:has-text('Continue without logging in')",
+    "button:has-text('Maybe later')", "button:has-text('Continue as guest')",
+    "svg[data-icon='times']", ".modal-close", "div[role='button']:has-text('Close')",
+    "button:has-text('Stay signed out')",
+    "button[aria-label='Dismiss']", ".modal__dismiss", "li-icon[type='cancel-icon']",
+    "button.artdeco-modal__dismiss", "[data-test-modal-close-btn]",
+    "button[data-control-name='overlay.close_overlay_btn']"
+]
+# Safety cap on dismiss clicks per close_popup call
+MAX_POPUP_CLICKS = 5
+LEARNED_SELECTORS_PER_DOMAIN = 5
+
+# Centres of the visible dismiss controls, in selector order, one per element, plus which of
+# the controls clicked earlier (`clicked`: ids this script handed out) are now gone or hidden.
+# Clicked controls that are still showing are never offered again.
+# Understands the `css:has-text('...')` form used above (case-insensitive substring, like Playwright)
+# and skips controls covered by something else, e.g. the page's own buttons under a modal.
+FIND_DISMISS_CANDIDATES = """
+([selectors, clicked]) => {
+    const attr = 'data-field-agent-dismiss';
+    const shown = (el) => {
+        if (!el || !el.isConnected) return false;
+        const rect = el.getBoundingClientRect();
+        return rect.width > 0 && rect.height > 0 && getComputedStyle(el).visibility !== 'hidden';
+    };
+    const gone = clicked.filter(id => !shown(document.querySelector(`[${attr}="${id}"]`)));
+    const found = [];
+    const taken = new Set();
+    for (const selector of selectors) {
+        const m = selector.match(/^(.*):has-text\\('(.*)'\\)$/);
+        const css = m ? m[1] : selector;
+        const text = m ? m[2].toLowerCase() : null;
+        let elements;
+        try { elements = document.querySelectorAll(css); } catch (e) { continue; }
+        for (const el of elements) {
+            if (taken.has(el) || clicked.includes(el.getAttribute(attr))) continue;
+            if (text && !(el.textContent || '').toLowerCase().includes(text)) continue;
+            if (!shown(el)) continue;
+            const rect = el.getBoundingClientRect();
+            const x = rect.left + rect.width / 2;
+            const y = rect.top + rect.height / 2;
+            if (x < 0 || y < 0 || x > window.innerWidth || y > window.innerHeight) continue;
+            const top = document.elementFromPoint(x, y);
+            if (!top || !(el === top || el.contains(top) || top.contains(el))) continue;
+            taken.add(el);
+            if (!el.hasAttribute(attr)) {
+                window.__fieldAgentDismissSeq = (window.__fieldAgentDismissSeq || 0) + 1;
+                el.setAttribute(attr, String(window.__fieldAgentDismissSeq));
+            }
+            found.push({ id: el.getAttribute(attr), selector, x, y });
+        }
+    }
+    return { candidates: found, gone };
+}
+"""
+
+_popup_cache = None
+
+def get_popup_cache() -> SqliteCache | None:
+    """Per-domain memo of the dismiss selectors that worked, or None when POPUP_CACHE_TTL=0."""
+    global _popup_cache
+    ttl = float(os.getenv("POPUP_CACHE_TTL", str(30 * 24 * 3600)))
+    if ttl <= 0:
+        return None
+    if _popup_cache is None:
+        _popup_cache = SqliteCache(
+            "popup_selectors",
+            ttl=ttl,
+            max_entries=int(os.getenv("POPUP_CACHE_MAX_ENTRIES", "10000")),
+        )
+    return _popup_cache
 
 class BrowserActions:
-    def __init__(self, page: Page, event_queue: asyncio.Queue, agent_id: str):
+    def __init__(self, page: Page, channel: EventChannel, agent_id: str, requested_url: str = None):
         self.page = page
-        self.event_queue = event_queue
+        # The URL the agent was sent to; saved site state is keyed by it, whatever the page redirected to
+        self.requested_url = requested_url
+        self.channel = channel
         self.agent_id = agent_id
+        # Replaces fixed post-action sleeps; create before navigating so it sees every request
+        self.settler = Settler(page)
+        
+        # Preview frame bookkeeping
+        self._cdp = None
+        self._last_frame_hash = None
+        self._last_frame_at = 0.0
+        self._trailing = None   # Pending frame for the end of the current rate-cap window
+        self._last_frame_size = 0
+        self.frames_sent = 0
+        self.frames_dropped = 0
+        self.bytes_sent = 0
+        self.bytes_saved = 0
+        
+        # Outcome of the last read_page ({text, used, skipped, exhausted})
+        self.last_read = None
+        # Selectors of the popups the last close_popup verifiably dismissed
+        self.last_dismissed = []
 
-    async def stream_frame(self, status: str):
-        """Helper to stream a frame to the frontend."""
+    async def _capture_frame(self) -> str:
+        """Returns a base64 JPEG of the viewport, downscaled to PREVIEW_SCALE."""
+        viewport = self.page.viewport_size
+        if viewport and PREVIEW_SCALE < 1:
+            try:
+                # CDP scales while encoding and hands back base64 directly (no full-size image, no re-encode)
+                if self._cdp is None:
+                    self._cdp = await self.page.context.new_cdp_session(self.page)
+                result = await self._cdp.send("Page.captureScreenshot", {
+                    "format": "jpeg",
+                    "quality": PREVIEW_QUALITY,
+                    "clip": {"x": 0, "y": 0, "width": viewport["width"], "height": viewport["height"], "scale": PREVIEW_SCALE},
+                })
+                return result["data"]
+            except Exception:
+                self._cdp = None
+        screenshot = await self.page.screenshot(type="jpeg", quality=PREVIEW_QUALITY)
+        return base64.b64encode(screenshot).decode("utf-8")
+
+    async def stream_frame(self, status: str, force: bool = False):
+        """Helper to stream a frame to the frontend (rate-limited and de-duplicated)."""
         try:
-            if not self.page.is_closed():
-                screenshot = await self.page.screenshot(type="jpeg", quality=40)
-                b64 = base64.b64encode(screenshot).decode("utf-8")
-                await self.event_queue.put(json.dumps({
-                    "type": "preview",
-                    "agent_id": self.agent_id,
-                    "url": self.page.url,
-                    "status": status,
-                    "image": f"data:image/jpeg;base64,{b64}"
-                }))
+            if self.page.is_closed():
+                return
+            
+            # Frame rate cap: skip the capture entirely if we sent one too recently
+            now = time.monotonic()
+            if not force and PREVIEW_MAX_FPS > 0 and now - self._last_frame_at < 1 / PREVIEW_MAX_FPS:
+                self.frames_dropped += 1
+                self.bytes_saved += self._last_frame_size
+                # The last change may land inside the window: show it once the window closes
+                if self._trailing is None or self._trailing.done():
+                    delay = self._last_frame_at + 1 / PREVIEW_MAX_FPS - now
+                    self._trailing = asyncio.create_task(self._trailing_frame(status, delay, self._last_frame_at))
+                return
+            
+            b64 = await self._capture_frame()
+            
+            # Unchanged frame: nothing new to show
+            frame_hash = hashlib.sha1(b64.encode("ascii")).digest()
+            if frame_hash == self._last_frame_hash:
+                self.frames_dropped += 1
+                self.bytes_saved += len(b64)
+                return
+            
+            self._last_frame_hash = frame_hash
+            self._last_frame_at = now
+            self._last_frame_size = len(b64)
+            self.frames_sent += 1
+            self.bytes_sent += len(b64)
+            await self.channel.put_preview(self.agent_id, json.dumps({
+                "type": "preview",
+                "agent_id": self.agent_id,
+                "url": self.page.url,
+                "status": status,
+                "image": f"data:image/jpeg;base64,{b64}"
+            }))
         except Exception:
             pass
 
+    async def _trailing_frame(self, status: str, delay: float, sent_at: float):
+        await asyncio.sleep(delay)
+        if self._last_frame_at == sent_at:  # Nothing was sent meanwhile
+            await self.stream_frame(status, force=True)
+
+    def frame_stats(self) -> dict:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_dropped": self.frames_dropped,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": self.bytes_saved,
+        }
+
+    def settle_summary(self) -> str:
+        return self.settler.summary()
+
     async def log(self, message: str):
-        await self.event_queue.put(json.dumps({"type": "log", "message": f"🤖 {self.agent_id}: {message}"}))
+        await self.channel.put(json.dumps({"type": "log", "message": f"🤖 {self.agent_id}: {message}"}))
 
     async def move_mouse_human(self, x, y):
         """Moves the mouse naturally."""
@@ -39,28 +250,31 @@ class BrowserActions:
 
     # --- TOOLS ---
 
+    @traced("tool")
     async def read_page(self) -> str:
-        """Reads the visible text content of the current page."""
+        """Reads the page text not returned by an earlier read (empty when nothing is new)."""
         await self.log("Reading page content...")
         await self.stream_frame("Reading")
         try:
-            text = await self.page.evaluate("document.body.innerText")
-            clean_text = ' '.join(text.split())[:5000] # Limit to 5k chars
-            return clean_text
+            result = await self.page.evaluate(READ_NEW_TEXT, READ_PAGE_BUDGET)
+            self.last_read = result
+            return result["text"]
         except Exception as e:
             return f"Error reading page: {e}"
 
+    @traced("tool")
     async def scroll_down(self) -> str:
         """Scrolls down the page to reveal more content."""
         await self.log("Scrolling down...")
         try:
             await self.page.evaluate("window.scrollBy(0, window.innerHeight)")
-            await asyncio.sleep(1) # Wait for load
+            await self.settler.settle("scroll_down", max_wait=3, baseline=1) # Wait for lazy content
             await self.stream_frame("Scrolled")
             return "Scrolled down successfully."
         except Exception as e:
             return f"Error scrolling: {e}"
 
+    @traced("tool")
     async def click_element(self, selector: str) -> str:
         """Clicks on an element matching the CSS selector."""
         await self.log(f"Clicking element: {selector}")
@@ -71,58 +285,72 @@ class BrowserActions:
                 if box:
                     await self.move_mouse_human(box['x'] + box['width']/2, box['y'] + box['height']/2)
                     await loc.click()
-                    await asyncio.sleep(2) # Wait for navigation/action
+                    await self.settler.settle("click_element", max_wait=5, baseline=2) # Wait for navigation/action
                     await self.stream_frame("Clicked")
                     return f"Successfully clicked {selector}."
             return f"Element {selector} not found or not visible."
         except Exception as e:
             return f"Error clicking {selector}: {e}"
 
+    @traced("tool")
     async def close_popup(self) -> str:
         """Attempts to close any visible modal or popup."""
         await self.log("Checking for popups...")
-        close_selectors = [
-            "button[aria-label='Close']", ".close", "#close-button", 
-            "button:has-text('No thanks')", "button:has-text('Not now')",
-            "button:has-text('Accept all')", "button:has-text('Accept Cookies')",
-            "[aria-label='Close modal']", "button:has-text('Continue without logging in')",
-            "button:has-text('Maybe later')", "button:has-text('Continue as guest')",
-            "svg[data-icon='times']", ".modal-close", "div[role='button']:has-text('Close')",
-            "button:has-text('Stay signed out')",
-            "button[aria-label='Dismiss']", ".modal__dismiss", "li-icon[type='cancel-icon']",
-            "button.artdeco-modal__dismiss", "[data-test-modal-close-btn]",
-            "button[data-control-name='overlay.close_overlay_btn']"
-        ]
+        cache = get_popup_cache()
+        domain = urlsplit(self.page.url).hostname or ""
+        cached = await cache.aget(domain) if cache and domain else None
+        learned = cached[0] if cached else []
+        # Selectors that worked on this domain before go first
+        selectors = learned + [s for s in CLOSE_SELECTORS if s not in learned]
         
-        closed_count = 0
+        clicked = {}      # id -> selector, clicked but not yet confirmed gone
+        dismissed = []    # selectors whose control went away after the click
         try:
-            # 1. Iterate through ALL selectors and click ALL visible ones
-            for selector in close_selectors:
-                locators = self.page.locator(selector)
-                count = await locators.count()
-                for i in range(count):
-                    loc = locators.nth(i)
-                    if await loc.is_visible():
-                        await self.log(f"Found popup: {selector}")
-                        try:
-                            box = await loc.bounding_box()
-                            if box:
-                                await self.move_mouse_human(box['x'] + box['width']/2, box['y'] + box['height']/2)
-                                await loc.click(timeout=1000)
-                                await asyncio.sleep(0.5)
-                                closed_count += 1
-                        except: pass
+            for attempt in range(MAX_POPUP_CLICKS + 1):
+                # One round trip finds every visible, unobstructed dismiss control and checks the last clicks
+                found = await self.page.evaluate(FIND_DISMISS_CANDIDATES, [selectors, list(clicked)])
+                for control in found["gone"]:
+                    dismissed.append(clicked.pop(control))
+                if not found["candidates"] or attempt == MAX_POPUP_CLICKS:
+                    break
+                target = found["candidates"][0]
+                await self.log(f"Found popup: {target['selector']}")
+                before = self.page.url
+                await self.move_mouse_human(target["x"], target["y"])
+                await self.page.mouse.click(target["x"], target["y"])
+                await self.settler.settle("close_popup", max_wait=2, baseline=0.5)
+                if self.page.url != before:
+                    # The control was a link, not a dismiss button: nothing to verify or learn
+                    await self.log(f"{target['selector']} navigated away")
+                    break
+                clicked[target["id"]] = target["selector"]
+            self.last_dismissed = dismissed
             
-            # 2. If we closed something, wait a bit and stream update
-            if closed_count > 0:
-                await asyncio.sleep(1)
+            # If we closed something, remember what worked and stream update
+            # (the page already settled after the last click; this replaces a fixed 1 s wait)
+            if dismissed:
+                if cache and domain:
+                    worked = list(dict.fromkeys(dismissed))
+                    await cache.aset(domain, (worked + [s for s in learned if s not in worked])[:LEARNED_SELECTORS_PER_DOMAIN])
+                self.settler.record("close_popup", 0, baseline=1)
+                # Verified dismissal: keep the consent cookies so the next visit to this domain starts clean
+                states = get_storage_state_store()
+                if states:
+                    try:
+                        if await states.save(self.page.context, self.requested_url or self.page.url, self.page.url):
+                            await self.log("Saved site state for later visits.")
+                    except Exception:
+                        pass
                 await self.stream_frame("Popups Closed")
-                return f"Closed {closed_count} popup(s)."
+                return f"Closed {len(dismissed)} popup(s)."
             
+            if clicked:
+                return f"Clicked {len(clicked)} control(s) but no popup went away."
             return "No popups found."
         except Exception as e:
             return f"Error closing popup: {e}"
 
+    @traced("tool")
     async def get_links(self, category: str) -> str:
         """
         Finds links matching a category (e.g., 'about', 'team', 'contact').
@@ -130,17 +358,41 @@ class BrowserActions:
         """
         await self.log(f"Looking for {category} links...")
         try:
-            links = await self.page.evaluate(f"""
-                (category) => {{
-                    const anchors = Array.from(document.querySelectorAll('a'));
-                    const keywords = [category.toLowerCase()];
-                    return anchors
-                        .filter(a => keywords.some(k => a.innerText.toLowerCase().includes(k)) || keywords.some(k => a.href.toLowerCase().includes(k)))
-                        .map(a => a.href)
-                        .filter(href => href.startsWith('http'))
-                        .slice(0, 5);
-                }}
-            """, category)
+            links = await self.find_links([category])
             return f"Found links: {', '.join(links)}" if links else "No links found."
         except Exception as e:
             return f"Error finding links: {e}"
+
+    # --- Helpers for the deterministic (LLM-free) field agent ---
+
+    async def find_links(self, keywords: list, same_site: bool = False, limit: int = 5) -> list:
+        """URLs of links whose text or href contains any keyword, in page order."""
+        return await self.page.evaluate("""
+            ([keywords, sameSite, limit]) => {
+                const anchors = Array.from(document.querySelectorAll('a'));
+                const words = keywords.map(k => k.toLowerCase());
+                const links = anchors
+                    .filter(a => words.some(k => a.innerText.toLowerCase().includes(k)) || words.some(k => a.href.toLowerCase().includes(k)))
+                    .map(a => a.href.split('#')[0])
+                    .filter(href => href.startsWith('http'))
+                    .filter(href => !sameSite || new URL(href).hostname === location.hostname)
+                    .filter(href => href !== location.href.split('#')[0]);
+                return [...new Set(links)].slice(0, limit);
+            }
+        """, [keywords, same_site, limit])
+
+    async def scroll_until_settled(self, max_scrolls: int = 4) -> int:
+        """Scrolls a viewport at a time until the bottom is reached and the page stops growing. Returns scrolls made."""
+        scrolls = 0
+        try:
+            for _ in range(max_scrolls):
+                at_bottom = await self.page.evaluate(
+                    "window.scrollY + window.innerHeight >= document.documentElement.scrollHeight - 2"
+                )
+                if at_bottom:
+                    break
+                await self.scroll_down()
+                scrolls += 1
+        except Exception:
+            pass
+        return scrolls
@@ -7,6 +7,41 @@ import ReportView, { FullAssessmentResponse } from "@/components/ReportView";
 import ResearchLog from "@/components/ResearchLog";
 import LivePreview from "@/components/LivePreview";
 
+// A report section streamed ahead of the final result
+interface DraftSection {
+    name: string;
+    data: unknown;
+}
+
+const sectionLabel = (key: string) => key.replace(/([A-Z])/g, ' $1').trim();
+
+// Renders a section's JSON as nested labelled lists, readable before the full report arrives
+function DraftValue({ value }: { value: unknown }) {
+    if (value === null || value === undefined || value === "") {
+        return <span className="text-slate-500">—</span>;
+    }
+    if (Array.isArray(value)) {
+        return (
+            <ul className="list-disc pl-4 space-y-1">
+                {value.map((item, i) => <li key={i}><DraftValue value={item} /></li>)}
+            </ul>
+        );
+    }
+    if (typeof value === "object") {
+        return (
+            <dl className="space-y-1">
+                {Object.entries(value as Record<string, unknown>).map(([key, item]) => (
+                    <div key={key}>
+                        <dt className="text-xs text-slate-500">{sectionLabel(key)}</dt>
+                        <dd className="pl-2"><DraftValue value={item} /></dd>
+                    </div>
+                ))}
+            </dl>
+        );
+    }
+    return <span>{String(value)}</span>;
+}
+
 function ReportContent() {
     const searchParams = useSearchParams();
     const companyQuery = searchParams.get("company");
@@ -18,6 +53,7 @@ function ReportContent() {
     const [logs, setLogs] = useState<any[]>([]);
     const [agents, setAgents] = useState<Record<string, any>>({}); // Multi-agent state
     const [summary, setSummary] = useState("");
+    const [sections, setSections] = useState<DraftSection[]>([]); // Report sections already streamed
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState("");
 
@@ -32,6 +68,7 @@ function ReportContent() {
             setLogs([]);
             setAgents({});
             setSummary("");
+            setSections([]);
             setData(null);
             setShowLogs(false); // Reset logs visibility on new search
 
@@ -44,60 +81,102 @@ function ReportContent() {
                     companyType: typeQuery || "other"
                 };
 
-                const response = await fetch("http://localhost:8000/api/assess", {
+                // The backend keeps running if the stream drops; we re-join it from the last event we saw
+                let assessmentId: string | null = null;
+                let lastEventId = "";
+                let finished = false;
+
+                const readStream = async (response: Response) => {
+                    if (!response.body) throw new Error("No response body");
+
+                    const reader = response.body.getReader();
+                    const decoder = new TextDecoder();
+                    let buffer = "";
+
+                    while (true) {
+                        const { done, value } = await reader.read();
+                        if (done) break;
+
+                        buffer += decoder.decode(value, { stream: true });
+                        const lines = buffer.split("\n");
+                        buffer = lines.pop() || "";
+
+                        for (const line of lines) {
+                            if (!line.trim()) continue;
+                            if (line.startsWith("id: ")) {
+                                lastEventId = line.slice(4);
+                            } else if (line.startsWith("data: ")) {
+                                try {
+                                    const msg = JSON.parse(line.slice(6));
+                                    if (msg.type === "log") {
+                                        setLogs(prev => [...prev, { ...msg, timestamp: Date.now() }]);
+                                    } else if (msg.type === "preview") {
+                                        // Update specific agent state
+                                        setAgents(prev => ({
+                                            ...prev,
+                                            [msg.agent_id]: {
+                                                id: msg.agent_id,
+                                                url: msg.url,
+                                                image: msg.image,
+                                                status: msg.status || "Active",
+                                                lastUpdate: Date.now()
+                                            }
+                                        }));
+                                    } else if (msg.type === "summary_reset") {
+                                        // The analyst (re)started: drop the draft of an interrupted attempt
+                                        setSummary("");
+                                        setSections([]);
+                                    } else if (msg.type === "summary") {
+                                        setSummary(prev => prev + msg.content);
+                                    } else if (msg.type === "section") {
+                                        const section = { name: msg.path[msg.path.length - 1], data: msg.data };
+                                        setSections(prev => prev.some(s => s.name === section.name)
+                                            ? prev.map(s => s.name === section.name ? section : s)
+                                            : [...prev, section]);
+                                    } else if (msg.type === "assessment") {
+                                        assessmentId = msg.id;
+                                    } else if (msg.type === "result") {
+                                        finished = true;
+                                        setData(msg.data);
+                                        setLoading(false);
+                                    } else if (msg.type === "error") {
+                                        finished = true;
+                                        setError(msg.message);
+                                        setLoading(false);
+                                    }
+                                } catch (e) {
+                                    console.error("Error parsing stream:", e);
+                                }
+                            }
+                        }
+                    }
+                };
+
+                let response = await fetch("http://localhost:8000/api/assess", {
                     method: "POST",
                     headers: { "Content-Type": "application/json" },
                     body: JSON.stringify(payload)
                 });
 
-                if (!response.body) throw new Error("No response body");
-
-                const reader = response.body.getReader();
-                const decoder = new TextDecoder();
-                let buffer = "";
-
-                while (true) {
-                    const { done, value } = await reader.read();
-                    if (done) break;
-
-                    buffer += decoder.decode(value, { stream: true });
-                    const lines = buffer.split("\n");
-                    buffer = lines.pop() || "";
-
-                    for (const line of lines) {
-                        if (!line.trim()) continue;
-                        if (line.startsWith("data: ")) {
-                            try {
-                                const msg = JSON.parse(line.slice(6));
-                                if (msg.type === "log") {
-                                    setLogs(prev => [...prev, { ...msg, timestamp: Date.now() }]);
-                                } else if (msg.type === "preview") {
-                                    // Update specific agent state
-                                    setAgents(prev => ({
-                                        ...prev,
-                                        [msg.agent_id]: {
-                                            id: msg.agent_id,
-                                            url: msg.url,
-                                            image: msg.image,
-                                            status: msg.status || "Active",
-                                            lastUpdate: Date.now()
-                                        }
-                                    }));
-                                } else if (msg.type === "summary") {
-                                    setSummary(prev => prev + msg.content);
-                                } else if (msg.type === "result") {
-                                    setData(msg.data);
-                                    setLoading(false);
-                                } else if (msg.type === "error") {
-                                    setError(msg.message);
-                                    setLoading(false);
-                                }
-                            } catch (e) {
-                                console.error("Error parsing stream:", e);
-                            }
-                        }
+                for (let attempt = 1; ; attempt++) {
+                    try {
+                        await readStream(response);
+                    } catch (e) {
+                        console.error("Stream interrupted:", e);
+                    }
+                    if (finished || !assessmentId || attempt > 5) break;
+
+                    await new Promise(resolve => setTimeout(resolve, 1000 * attempt));
+                    try {
+                        response = await fetch(`http://localhost:8000/api/assess/${assessmentId}/events`, {
+                            headers: lastEventId ? { "Last-Event-ID": lastEventId } : {}
+                        });
+                    } catch (e) {
+                        console.error("Reconnect failed:", e);
                     }
                 }
+
+                if (!finished) throw new Error("Stream ended before the assessment finished");
             } catch (err) {
                 console.error(err);
                 setError("Failed to generate risk assessment. Please try again.");
@@ -137,6 +216,32 @@ function ReportContent() {
                                     agents={agents}
                                     isActive={loading}
                                 />
+
+                                {(summary || sections.length > 0) && (
+                                    <div className="p-6 rounded-xl bg-slate-900/60 border border-slate-700 space-y-4">
+                                        <div className="flex items-center gap-2 text-sm font-mono text-slate-400">
+                                            <Loader2 className="w-4 h-4 animate-spin" />
+                                            Analyst draft
+                                        </div>
+                                        <div className="text-sm text-slate-300 whitespace-pre-wrap max-h-96 overflow-y-auto">
+                                            {summary}
+                                        </div>
+                                        {sections.length > 0 && (
+                                            <div className="space-y-3 max-h-96 overflow-y-auto">
+                                                {sections.map(section => (
+                                                    <div key={section.name} className="p-3 rounded-lg bg-slate-800/60 border border-slate-700">
+                                                        <div className="mb-2 text-xs text-slate-400 font-mono">
+                                                            {sectionLabel(section.name)}
+                                                        </div>
+                                                        <div className="text-sm text-slate-300">
+                                                            <DraftValue value={section.data} />
+                                                        </div>
+                                                    </div>
+                                                ))}
+                                            </div>
+                                        )}
+                                    </div>
+                                )}
                             </div>
                         </div>
 
@@ -0,0 +1,50 @@
+import json
+import shutil
+import subprocess
+import pytest
+
+pytest.importorskip("playwright")
+from backend.tools import READ_NEW_TEXT
+
+# Minimal DOM for the script: a body whose innerText is settable, and a no-op MutationObserver
+HARNESS = """
+globalThis.window = globalThis;
+globalThis.MutationObserver = class { observe() {} };
+globalThis.document = { documentElement: {}, body: { innerText: '' } };
+const read = %s;
+const out = [];
+for (const [text, budget] of %s) {
+    document.body.innerText = text;
+    window.__fieldAgentRead && (window.__fieldAgentRead.dirty = true);
+    out.push(read(budget));
+}
+console.log(JSON.stringify(out));
+"""
+
+
+def run_reads(reads: list) -> list:
+    if not shutil.which("node"):
+        pytest.skip("node is not installed")
+    script = HARNESS % (READ_NEW_TEXT.strip(), json.dumps(reads))
+    return json.loads(subprocess.run(["node", "-e", script], capture_output=True, text=True, check=True).stdout)
+
+
+def test_stays_within_a_tiny_budget():
+    # The first line fills the budget exactly; the second must not leak through
+    [result] = run_reads([["0123456789\n" + "x" * 50, 10]])
+    assert result["text"] == "0123456789"
+    assert result["used"] == 10
+    assert result["exhausted"]
+
+
+def test_counts_the_separator_between_lines():
+    [result] = run_reads([["abcd\nefgh\nijkl", 7]])
+    assert result["text"] == "abcd ef"
+    assert len(result["text"]) == result["used"] == 7
+
+
+def test_later_reads_return_only_new_lines_within_what_is_left():
+    first, second = run_reads([["one\ntwo", 12], ["one\ntwo\nthree four", 12]])
+    assert first["text"] == "one two"
+    assert second["text"] == "three"
+    assert second["used"] == 12